@@ -0,0 +1 @@
+# Benchmarks do simulador: python -m benchmarks --help
@@ -0,0 +1,243 @@
+import argparse
+import json
+import math
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import synthetic
+from dividas.core import BASE_START, CSV_SCHEMAS, DEFAULT_INPC_2025, _csv_cache, load_csv_if_exists, prepare_debts, prepare_rows, save_csv
+from dividas.engine import aportes_to_array, debts_to_arrays, inpc_rate_matrix, simulate_batch, simulate_vectorized
+from dividas.events import simulate_event_driven
+from dividas import ledger
+
+# ---------------- Benchmarks ----------------
+# python -m benchmarks [--rapido] [--baseline benchmarks/baseline.json] [--limite 20]
+# Cada caso roda `repeticoes` vezes (vale o menor tempo) e mais uma vez sob
+# tracemalloc para o pico de memória (NumPy e pandas registram suas alocações
+# nele). O resultado vai para um JSON; com --baseline, a saída é 1 quando algum
+# caso ficou mais de --limite % mais lento que o baseline.
+
+SAIDA_PADRAO = os.path.join("benchmarks", "ultimo.json")
+BASELINE_PADRAO = os.path.join("benchmarks", "baseline.json")
+
+GRADES = {
+    "completa": {
+        "dividas": (10, 100, 1000, 10000),
+        "meses": (12, 120, 600),
+        "cenarios": (1, 100, 1000, 10000),
+        "anos": (1, 5, 20),
+        "eventos_max": 1000,
+        "ids_pagamentos": 200,
+    },
+    "rapida": {
+        "dividas": (10, 100, 1000),
+        "meses": (12, 120),
+        "cenarios": (1, 100, 1000),
+        "anos": (1, 5),
+        "eventos_max": 100,
+        "ids_pagamentos": 50,
+    },
+}
+
+
+def case_key(nome, params):
+    return nome + "[" + ",".join(f"{k}={v}" for k, v in params.items()) + "]"
+
+
+def load_setup(path, schema, frio):
+    # frio: sem o cache por mtime de load_csv_if_exists (parse completo); senão já aquecido.
+    # O schema vai explícito: os arquivos daqui (dividas_{n}.csv) não batem com os nomes de CSV_SCHEMAS.
+    if frio:
+        _csv_cache.clear()
+    else:
+        load_csv_if_exists(path, schema)
+    return lambda: load_csv_if_exists(path, schema)
+
+
+def cases(grade, tmp):
+    # (nome, params, setup) — setup devolve a função a medir, sem argumentos
+    meses_sim = 120
+    for n in grade["dividas"]:
+        df = synthetic.portfolio(n)
+        yield "prepare_debts", {"dividas": n}, lambda df=df: (lambda: prepare_debts(df, DEFAULT_INPC_2025))
+        recs = df.to_dict("records")
+        yield "prepare_rows", {"dividas": n}, lambda recs=recs: (lambda: prepare_rows(recs, DEFAULT_INPC_2025))
+
+        path = os.path.join(tmp, f"dividas_{n}.csv")
+        save_csv(df, path)
+        yield "csv_dividas_load", {"dividas": n}, lambda path=path: load_setup(path, CSV_SCHEMAS["dividas.csv"], frio=True)
+        yield "csv_dividas_load_cache", {"dividas": n}, lambda path=path: load_setup(path, CSV_SCHEMAS["dividas.csv"], frio=False)
+        yield "csv_dividas_save", {"dividas": n}, lambda df=df, path=path: (lambda: save_csv(df, path))
+
+        debts = prepare_debts(df, DEFAULT_INPC_2025)
+        for t in grade["meses"]:
+            ap = synthetic.aportes(df, t)
+            yield "simulate_vectorized", {"dividas": n, "meses": t}, (
+                lambda debts=debts, ap=ap, t=t: (lambda: simulate_vectorized(debts, ap, t, BASE_START)))
+            if n <= grade["eventos_max"]:
+                yield "simulate_event_driven", {"dividas": n, "meses": t}, (
+                    lambda debts=debts, ap=ap, t=t: (lambda: simulate_event_driven(debts, ap, t, BASE_START)))
+
+    df = synthetic.portfolio(10)
+    debts0 = prepare_debts(df, 0.0)
+    saldo, _, parcela = debts_to_arrays(debts0)
+    ap = aportes_to_array(synthetic.aportes(df, meses_sim), meses_sim)
+    for s in grade["cenarios"]:
+        def setup(s=s):
+            # s cenários de INPC (0 a 15% a.a.), mesmos aportes
+            rate_m = inpc_rate_matrix(debts0, np.linspace(0.0, 15.0, s))
+            aps = np.broadcast_to(ap, (s, ap.size))
+            return lambda: simulate_batch(saldo, rate_m, parcela, aps, meses_sim)
+        yield "simulate_batch", {"cenarios": s, "dividas": 10, "meses": meses_sim}, setup
+
+    ids = synthetic.portfolio(grade["ids_pagamentos"])
+    for anos in grade["anos"]:
+        pag = synthetic.pagamentos(ids, anos)
+        csv_path = os.path.join(tmp, f"pagamentos_{anos}.csv")
+        save_csv(pag, csv_path)
+        ultima = pag["competencia"].iloc[-1]
+        mes = pag[pag["competencia"] == ultima].copy()
+        mes["pago"] = ~mes["pago"]
+        params = {"anos": anos, "linhas": len(pag)}
+        yield "csv_pagamentos_load", params, lambda p=csv_path: load_setup(p, CSV_SCHEMAS["pagamentos.csv"], frio=True)
+        # caminho antigo do checklist: lê tudo, troca a competência e regrava o CSV inteiro
+        yield "csv_pagamentos_save", params, lambda p=csv_path, pag=pag, ultima=ultima, mes=mes: (
+            lambda: save_csv(pd.concat([pag[pag["competencia"] != ultima], mes], ignore_index=True), p))
+
+        def setup_migracao(p=csv_path):
+            fd, db = tempfile.mkstemp(suffix=".sqlite", dir=tmp)  # arquivo vazio = banco novo
+            os.close(fd)
+            return lambda: ledger.connect(db, legacy_csv=p).close()
+        yield "ledger_migracao", params, setup_migracao
+
+        db = os.path.join(tmp, f"pagamentos_{anos}.sqlite")
+        ledger.connect(db, legacy_csv=csv_path).close()
+        yield "ledger_read", params, lambda db=db, c=ultima: (lambda: ledger.read_competencia(c, path=db))
+        yield "ledger_save", params, lambda db=db, c=ultima, mes=mes: (lambda: ledger.save_competencia(mes, c, path=db))
+
+
+def measure(setup, repeticoes, memoria=True):
+    tempos = []
+    for _ in range(repeticoes):
+        fn = setup()
+        t0 = time.perf_counter()
+        fn()
+        tempos.append(time.perf_counter() - t0)
+    pico = None
+    if memoria:
+        fn = setup()
+        tracemalloc.start()
+        try:
+            tracemalloc.reset_peak()
+            fn()
+            pico = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return {"tempo_s": min(tempos), "mediana_s": statistics.median(tempos), "pico_mem_bytes": pico}
+
+
+def scaling(resultados):
+    # expoente empírico entre tamanhos vizinhos (1 = linear) para cada família;
+    # o primeiro parâmetro de cada caso é o tamanho que varia
+    por_familia = {}
+    for r in resultados:
+        params = dict(r["params"])
+        var = next(iter(params))
+        x = params.pop(var)
+        params.pop("linhas", None)
+        por_familia.setdefault(case_key(r["nome"], params) + f" x {var}", []).append((x, r["tempo_s"]))
+    out = {}
+    for fam, pts in por_familia.items():
+        pts.sort()
+        out[fam] = [
+            round(math.log(t2 / t1) / math.log(x2 / x1), 2) if t1 > 0 and t2 > 0 else None
+            for (x1, t1), (x2, t2) in zip(pts, pts[1:])
+        ]
+    return out
+
+
+def compare(resultados, baseline, limite_pct, piso_ms):
+    base = {r["chave"]: r for r in baseline.get("resultados", [])}
+    regressoes = []
+    for r in resultados:
+        b = base.get(r["chave"])
+        if b is None:
+            continue
+        lento = r["tempo_s"] > b["tempo_s"] * (1.0 + limite_pct / 100.0)
+        # abaixo do piso a diferença é ruído de medição
+        if lento and (r["tempo_s"] - b["tempo_s"]) * 1000.0 > piso_ms:
+            regressoes.append((r["chave"], b["tempo_s"], r["tempo_s"]))
+    return regressoes
+
+
+def build_parser():
+    p = argparse.ArgumentParser(prog="benchmarks", description="Benchmarks do simulador de dívidas (carteiras e histórico sintéticos).")
+    p.add_argument("--rapido", action="store_true", help="grade menor (até 1.000 dívidas/cenários)")
+    p.add_argument("--filtro", default="", help="só casos cujo nome contém este texto")
+    p.add_argument("--repeticoes", type=int, default=3, help="repetições por caso; vale o menor tempo (padrão: %(default)s)")
+    p.add_argument("--sem-memoria", action="store_true", help="não mede o pico de memória (tracemalloc)")
+    p.add_argument("--saida", default=SAIDA_PADRAO, help="JSON de resultados (padrão: %(default)s)")
+    p.add_argument("--baseline", default=BASELINE_PADRAO, help="JSON de referência para o portão de regressão (padrão: %(default)s)")
+    p.add_argument("--salvar-baseline", action="store_true", help="grava os resultados também como baseline")
+    p.add_argument("--limite", type=float, default=20.0, help="falha se algum caso ficar mais de X%% mais lento (padrão: %(default)s)")
+    p.add_argument("--piso-ms", type=float, default=1.0, help="ignora diferenças menores que isto em ms (padrão: %(default)s)")
+    return p
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    grade = GRADES["rapida" if args.rapido else "completa"]
+    tmp = tempfile.mkdtemp(prefix="dividas_bench_")
+    resultados = []
+    try:
+        for nome, params, setup in cases(grade, tmp):
+            chave = case_key(nome, params)
+            if args.filtro not in chave:
+                continue
+            r = measure(setup, args.repeticoes, memoria=not args.sem_memoria)
+            resultados.append({"chave": chave, "nome": nome, "params": params, **r})
+            pico = f"{r['pico_mem_bytes'] / 2**20:9.1f} MB" if r["pico_mem_bytes"] is not None else ""
+            print(f"{chave:<60} {r['tempo_s'] * 1000:10.2f} ms {pico}", flush=True)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    doc = {
+        "quando": datetime.now().isoformat(timespec="seconds"),
+        "grade": "rapida" if args.rapido else "completa",
+        "ambiente": {
+            "python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+            "plataforma": platform.platform(), "cpus": os.cpu_count(),
+        },
+        "resultados": resultados,
+        "escala": scaling(resultados),
+    }
+    for path in [args.saida] + ([args.baseline] if args.salvar_baseline else []):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=2, ensure_ascii=False)
+    print(f"Resultados em {args.saida}" + (f" e {args.baseline}" if args.salvar_baseline else ""))
+
+    if args.salvar_baseline or not os.path.exists(args.baseline):
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        regressoes = compare(resultados, json.load(f), args.limite, args.piso_ms)
+    for chave, antes, agora in regressoes:
+        print(f"REGRESSÃO {chave}: {antes * 1000:.2f} ms -> {agora * 1000:.2f} ms (+{(agora / antes - 1) * 100:.0f}%)", file=sys.stderr)
+    if regressoes:
+        return 1
+    print(f"Sem regressões acima de {args.limite:g}% em relação a {args.baseline}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+from dividas.core import BASE_START, add_months
+
+# ---------------- Dados sintéticos ----------------
+# Carteiras no formato de dividas.csv e histórico no formato de pagamentos.csv,
+# sempre a partir de uma semente fixa para que duas rodadas meçam a mesma coisa.
+
+TIPOS = np.array(["Consignado PRICE", "Fixo", "INPC + Spread", "Subsidiado"])
+DIVIDAS_COLS = ["id", "nome", "tipo", "saldo_atual", "parcela", "juros_aa", "indexador", "spread_aa", "prioridade"]
+
+
+def portfolio(n_debts, seed=0):
+    rng = np.random.default_rng(seed)
+    n = int(n_debts)
+    tipo = TIPOS[rng.choice(TIPOS.size, size=n, p=[0.5, 0.2, 0.2, 0.1])]
+    saldo = np.round(rng.lognormal(np.log(20000.0), 0.8, n), 2)
+    juros_aa = np.round(np.where(tipo == "Subsidiado", 3.0, rng.uniform(8.0, 28.0, n)), 2)
+    spread_aa = np.where(tipo == "INPC + Spread", np.round(rng.uniform(4.0, 8.0, n), 2), 0.0)
+    # parcela PRICE para prazos de 24 a 120 meses
+    r = (1.0 + np.where(tipo == "INPC + Spread", 4.5 + spread_aa, juros_aa) / 100.0) ** (1.0 / 12.0) - 1.0
+    prazo = rng.integers(24, 121, n)
+    parcela = np.round(saldo * r / (1.0 - (1.0 + r) ** -prazo), 2)
+    ids = np.char.add("SINT-", np.arange(n).astype(str))
+    return pd.DataFrame({
+        "id": ids,
+        "nome": np.char.add("Dívida sintética ", np.arange(n).astype(str)),
+        "tipo": tipo,
+        "saldo_atual": saldo,
+        "parcela": parcela,
+        "juros_aa": np.where(tipo == "INPC + Spread", "", juros_aa.astype(str)),
+        "indexador": np.where(tipo == "INPC + Spread", "INPC", ""),
+        "spread_aa": spread_aa,
+        "prioridade": rng.permutation(n) + 1,
+    }, columns=DIVIDAS_COLS)
+
+
+def aportes(debts_df, months, fracao=0.1):
+    # aporte constante = fração da soma das parcelas (a carteira não quita cedo demais)
+    valor = round(float(debts_df["parcela"].sum()) * fracao, 2)
+    return pd.DataFrame({"mes": np.arange(1, int(months) + 1), "aporte": valor})
+
+
+def pagamentos(debts_df, anos, seed=0):
+    rng = np.random.default_rng(seed)
+    meses = int(anos) * 12
+    comps = [add_months(BASE_START, -k).strftime("%Y-%m") for k in range(meses, 0, -1)]
+    ids = debts_df["id"].to_numpy()
+    n = ids.size
+    pago = rng.random(meses * n) < 0.9
+    dia = rng.integers(1, 29, meses * n)
+    comp = np.repeat(comps, n)
+    data = np.where(pago, np.char.add(np.char.add(comp, "-"), np.char.zfill(dia.astype(str), 2)), "")
+    return pd.DataFrame({"competencia": comp, "id": np.tile(ids, meses), "pago": pago, "data_pagamento": data})
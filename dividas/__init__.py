@@ -0,0 +1,45 @@
+# Pacote sem UI do simulador de dívidas. Os nomes abaixo são carregados sob
+# demanda (PEP 562) para que `import dividas` não puxe numpy/pandas.
+
+_EXPORTS = {
+    "DEFAULT_INPC_2025": "dividas.core",
+    "BASE_DAY": "dividas.core",
+    "BASE_START": "dividas.core",
+    "a2m": "dividas.core",
+    "compute_competencia": "dividas.core",
+    "add_months": "dividas.core",
+    "CSV_SCHEMAS": "dividas.core",
+    "read_typed_csv": "dividas.core",
+    "load_csv_if_exists": "dividas.core",
+    "save_csv": "dividas.core",
+    "prepare_rows": "dividas.core",
+    "prepare_debts": "dividas.core",
+    "simulate": "dividas.core",
+    "make_aportes_constantes": "dividas.core",
+    "run_and_summarize": "dividas.core",
+    "a2m_array": "dividas.engine",
+    "debts_to_arrays": "dividas.engine",
+    "aportes_to_array": "dividas.engine",
+    "simulate_batch": "dividas.engine",
+    "simulate_arrays": "dividas.engine",
+    "simulate_vectorized": "dividas.engine",
+    "timeline_from_arrays": "dividas.engine",
+    "payoff_from_arrays": "dividas.engine",
+    "DETALHE_CAMPOS": "dividas.engine",
+    "alloc_detail": "dividas.engine",
+    "detail_frame": "dividas.engine",
+    "detail_arrow": "dividas.engine",
+    "inpc_rate_matrix": "dividas.engine",
+    "scenario_grid": "dividas.engine",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module 'dividas' has no attribute {name!r}")
+    import importlib
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,3 @@
+from dividas.cli import main
+
+raise SystemExit(main())
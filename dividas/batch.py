@@ -0,0 +1,203 @@
+import argparse
+import csv
+import os
+import sys
+import time
+from datetime import date
+
+from dividas.core import BASE_START, DEFAULT_INPC_2025, add_months, prepare_rows
+from dividas.pool import imap_bounded
+
+# ---------------- Lote de carteiras (vários clientes) ----------------
+# python -m dividas.batch --entrada CLIENTES [--aportes APORTES.csv] --saida resumo_lote.csv
+# Entrada:
+#   - diretório com uma pasta por cliente, cada uma com dividas.csv (e aportes.csv opcional),
+#     o mesmo layout do app; ou
+#   - um CSV longo com a coluna `cliente` + colunas de dividas.csv, agrupado por cliente
+#     em ordem crescente; os aportes vêm de --aportes (cliente,mes,aporte) na mesma ordem.
+# Os clientes são lidos sob demanda, juntados em blocos e cada bloco vira um único
+# simulate_batch (dívidas completadas com saldo e parcela zero até o maior N do bloco).
+# Só `pendentes` blocos ficam em memória/em voo, e o resumo é gravado bloco a bloco,
+# então o uso de memória não cresce com o número de clientes.
+
+RESUMO_COLS = ["cliente", "dividas", "status", "meses_quitacao", "quitado_em", "juros_total", "saldo_final", "erro"]
+
+
+def _read_aportes_pairs(rows, months):
+    out = {}
+    for r in rows:
+        try:
+            m = int(float(r["mes"]))
+        except (KeyError, TypeError, ValueError):
+            continue
+        if 1 <= m <= months:
+            try:
+                out[m] = float(r.get("aporte") or 0.0)
+            except ValueError:
+                out[m] = 0.0
+    return out
+
+
+def iter_clients_dir(path, months):
+    with os.scandir(path) as it:
+        nomes = sorted(e.name for e in it if e.is_dir())
+    for nome in nomes:
+        pasta = os.path.join(path, nome)
+        dividas_path = os.path.join(pasta, "dividas.csv")
+        if not os.path.exists(dividas_path):
+            continue
+        with open(dividas_path, newline="", encoding="utf-8") as f:
+            records = list(csv.DictReader(f))
+        aportes = None
+        aportes_path = os.path.join(pasta, "aportes.csv")
+        if os.path.exists(aportes_path):
+            with open(aportes_path, newline="", encoding="utf-8") as f:
+                aportes = _read_aportes_pairs(csv.DictReader(f), months)
+        yield nome, records, aportes
+
+
+def _groups(path, what):
+    # (cliente, linhas) para um CSV longo agrupado por cliente em ordem crescente
+    with open(path, newline="", encoding="utf-8") as f:
+        atual, linhas = None, []
+        for r in csv.DictReader(f):
+            c = r["cliente"]
+            if c != atual:
+                if atual is not None:
+                    if c < atual:
+                        raise ValueError(f"{what} fora de ordem: cliente {c!r} depois de {atual!r} (ordene por cliente)")
+                    yield atual, linhas
+                atual, linhas = c, []
+            linhas.append(r)
+        if atual is not None:
+            yield atual, linhas
+
+
+def iter_clients_long(path, aportes_path, months):
+    aportes = _groups(aportes_path, "aportes") if aportes_path else iter(())
+    prox = next(aportes, None)
+    for cliente, records in _groups(path, "entrada"):
+        # merge pela chave cliente: planos de aporte sem carteira são pulados
+        while prox is not None and prox[0] < cliente:
+            prox = next(aportes, None)
+        plano = None
+        if prox is not None and prox[0] == cliente:
+            plano = _read_aportes_pairs(prox[1], months)
+            prox = next(aportes, None)
+        yield cliente, records, plano
+
+
+def iter_blocks(clients, tamanho):
+    bloco = []
+    for c in clients:
+        bloco.append(c)
+        if len(bloco) >= tamanho:
+            yield bloco
+            bloco = []
+    if bloco:
+        yield bloco
+
+
+def _run_block(args):
+    import numpy as np
+    from dividas.engine import simulate_batch
+    bloco, inpc, months, base_date, aporte_padrao = args
+    linhas, ok = [None] * len(bloco), []
+    for i, (cliente, records, plano) in enumerate(bloco):
+        try:
+            ok.append((i, cliente, prepare_rows(records, inpc), plano))
+        except (KeyError, TypeError, ValueError) as e:
+            linhas[i] = {"cliente": cliente, "status": "ERRO", "erro": f"{type(e).__name__}: {e}"}
+    if ok:
+        S, N = len(ok), max(1, max(len(d) for _, _, d, _ in ok))
+        saldo, rate_m, parcela = np.zeros((S, N)), np.zeros((S, N)), np.zeros((S, N))
+        aportes = np.full((S, months), float(aporte_padrao))
+        for s, (_, _, debts, plano) in enumerate(ok):
+            n = len(debts)
+            saldo[s, :n] = [d["saldo"] for d in debts]
+            rate_m[s, :n] = [d["rate_m"] for d in debts]
+            parcela[s, :n] = [d["parcela"] for d in debts]
+            if plano is not None:
+                aportes[s] = 0.0
+                for m, v in plano.items():
+                    aportes[s, m - 1] = v
+        res = simulate_batch(saldo, rate_m, parcela, aportes, months)
+        juros = res["juros_do_mes"].sum(axis=1)
+        saldo_final = res["saldo_final"].sum(axis=1)
+        for s, (i, cliente, debts, _) in enumerate(ok):
+            # mesmo critério de run_and_summarize: último mês simulado e saldo final
+            meses = int(res["meses"][s])
+            quitou = saldo_final[s] <= 0.01
+            linhas[i] = {
+                "cliente": cliente,
+                "dividas": len(debts),
+                "status": "QUITADO" if quitou else "NÃO QUITADO",
+                "meses_quitacao": meses,
+                "quitado_em": add_months(base_date, meses - 1).isoformat() if quitou and meses else "",
+                "juros_total": round(float(juros[s]), 2),
+                "saldo_final": round(float(saldo_final[s]), 2),
+            }
+    return linhas
+
+
+def run_batch(clients, saida, inpc=DEFAULT_INPC_2025, months=120, base_date=BASE_START, aporte_padrao=0.0,
+              workers=None, bloco=256, pendentes=None, progresso=None):
+    jobs = ((b, inpc, int(months), base_date, aporte_padrao) for b in iter_blocks(clients, bloco))
+    total = erros = 0
+    with open(saida, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=RESUMO_COLS)
+        w.writeheader()
+        for linhas in imap_bounded(_run_block, jobs, workers, pendentes):
+            w.writerows(linhas)
+            f.flush()
+            total += len(linhas)
+            erros += sum(1 for r in linhas if r["status"] == "ERRO")
+            if progresso is not None:
+                progresso(total, erros)
+    return total, erros
+
+
+def build_parser():
+    p = argparse.ArgumentParser(prog="dividas.batch", description="Simula muitas carteiras de dívidas e grava um resumo por cliente.")
+    p.add_argument("--entrada", required=True, help="diretório com uma pasta por cliente (dividas.csv/aportes.csv) ou CSV longo com coluna `cliente`")
+    p.add_argument("--aportes", help="CSV longo cliente,mes,aporte (só com --entrada em CSV longo; mesma ordem de clientes)")
+    p.add_argument("--aporte", type=float, default=0.0, help="aporte mensal de quem não tem plano de aportes (padrão: %(default)s)")
+    p.add_argument("--inpc", type=float, default=DEFAULT_INPC_2025, help="INPC anual em %% (padrão: %(default)s)")
+    p.add_argument("--meses", type=int, default=120, help="horizonte em meses (padrão: %(default)s)")
+    p.add_argument("--base", type=date.fromisoformat, default=BASE_START.date(), help="data do 1º mês, AAAA-MM-DD (padrão: %(default)s)")
+    p.add_argument("--saida", default="resumo_lote.csv", help="CSV do resumo (padrão: %(default)s)")
+    p.add_argument("--workers", type=int, help="processos (padrão: núcleos da máquina)")
+    p.add_argument("--bloco", type=int, default=256, help="clientes por bloco/simulação (padrão: %(default)s)")
+    p.add_argument("--pendentes", type=int, help="blocos em voo ao mesmo tempo (padrão: 2 x workers)")
+    return p
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if os.path.isdir(args.entrada):
+        clients = iter_clients_dir(args.entrada, args.meses)
+    elif os.path.exists(args.entrada):
+        clients = iter_clients_long(args.entrada, args.aportes, args.meses)
+    else:
+        print(f"Entrada não encontrada: {args.entrada}", file=sys.stderr)
+        return 2
+    t0 = time.perf_counter()
+
+    def progresso(total, erros):
+        print(f"\r{total} clientes ({erros} com erro) — {time.perf_counter() - t0:.1f} s", end="", file=sys.stderr, flush=True)
+
+    try:
+        total, erros = run_batch(
+            clients, args.saida, args.inpc, args.meses, args.base, args.aporte,
+            workers=args.workers, bloco=args.bloco, pendentes=args.pendentes, progresso=progresso,
+        )
+    except ValueError as e:
+        print(f"\nErro na entrada: {e}", file=sys.stderr)
+        return 2
+    print(file=sys.stderr)
+    print(f"{total} clientes simulados ({erros} com erro) — resumo em {args.saida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# ---------------- Cache de simulações ----------------
+# Chave = hash estável do conteúdo (dívidas preparadas, vetor de aportes,
+# horizonte, data base), não da identidade dos objetos, então o mesmo cenário
+# recalculado num rerun do Streamlit cai no mesmo resultado. O módulo é
+# importado uma vez por processo, logo o cache em memória sobrevive aos reruns.
+# O INPC entra pela rate_m das dívidas preparadas.
+# O cache é compartilhado por todas as sessões (threads) do processo: a camada
+# em memória fica sob um lock e a pasta do disco vem em cada chamada, para que
+# a escolha de uma sessão não ligue nem desligue o disco das outras.
+
+CACHE_DIR = ".cache_simulacao"
+_COLS_NUM = ("saldo", "parcela", "rate_m", "prioridade")
+_COLS_TXT = ("id", "nome", "tipo")
+
+
+def simulation_key(debts_df, aportes, months, base_date, *extra):
+    h = hashlib.blake2b(digest_size=16)
+    for c in _COLS_NUM:
+        if c in debts_df.columns:
+            h.update(np.ascontiguousarray(debts_df[c].to_numpy(dtype=np.float64)).tobytes())
+    for c in _COLS_TXT:
+        if c in debts_df.columns:
+            h.update("\x1f".join(map(str, debts_df[c].tolist())).encode("utf-8"))
+        h.update(b"\x1e")
+    h.update(np.ascontiguousarray(np.asarray(aportes, dtype=np.float64)).tobytes())
+    h.update(repr((int(months), pd.Timestamp(base_date).isoformat()) + extra).encode("utf-8"))
+    return h.hexdigest()
+
+
+class SimulationCache:
+    def __init__(self, maxsize=128, disk_maxfiles=512):
+        self.maxsize = maxsize
+        self.disk_maxfiles = disk_maxfiles
+        self._mem = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _put(self, key, value):
+        # chamado com o lock
+        self._mem[key] = value
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.maxsize:
+            self._mem.popitem(last=False)
+
+    def _load_disk(self, key, disk_dir):
+        if not disk_dir:
+            return None
+        try:
+            with open(_disk_path(disk_dir, key), "rb") as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError, ValueError, TypeError):
+            # ausente, truncado ou gravado por outra versão do código: recalcula
+            return None
+
+    def _save_disk(self, key, value, disk_dir):
+        if not disk_dir:
+            return
+        try:
+            os.makedirs(disk_dir, exist_ok=True)
+            destino = _disk_path(disk_dir, key)
+            tmp = f"{destino}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, destino)
+            arquivos = _disk_files(disk_dir)
+            if len(arquivos) > self.disk_maxfiles:
+                arquivos.sort(key=os.path.getmtime)
+                for a in arquivos[:len(arquivos) - self.disk_maxfiles]:
+                    os.remove(a)
+        except OSError:
+            pass
+
+    def get_or_compute(self, key, compute, disk_dir=None):
+        with self._lock:
+            if key in self._mem:
+                self.hits += 1
+                self._mem.move_to_end(key)
+                return self._mem[key]
+        # disco e cálculo fora do lock: duas sessões com a mesma chave podem calcular
+        # em paralelo, mas o resultado é o mesmo
+        value = self._load_disk(key, disk_dir)
+        with self._lock:
+            if value is not None:
+                self.disk_hits += 1
+                self._put(key, value)
+                return value
+            self.misses += 1
+        value = compute()
+        with self._lock:
+            self._put(key, value)
+        self._save_disk(key, value, disk_dir)
+        return value
+
+    def clear(self, disk_dir=None):
+        with self._lock:
+            self._mem.clear()
+            self.hits = self.disk_hits = self.misses = 0
+        if disk_dir and os.path.isdir(disk_dir):
+            for a in _disk_files(disk_dir):
+                try:
+                    os.remove(a)
+                except OSError:
+                    pass
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses, "itens": len(self._mem)}
+
+
+def _disk_path(disk_dir, key):
+    return os.path.join(disk_dir, f"{key}.pkl")
+
+
+def _disk_files(disk_dir):
+    return [os.path.join(disk_dir, n) for n in os.listdir(disk_dir) if n.endswith(".pkl")]
+
+
+simulation_cache = SimulationCache()
@@ -0,0 +1,102 @@
+import argparse
+import csv
+import os
+import sys
+from datetime import date
+
+from dividas.core import BASE_START, DEFAULT_INPC_2025, add_months, prepare_rows
+
+# ---------------- Linha de comando ----------------
+# Lê dividas.csv/aportes.csv, simula e grava cronograma e datas de quitação em CSV.
+# Só usa csv + NumPy (sem pandas) para subir rápido em jobs em lote.
+
+MOTORES = ("arrays", "eventos")
+TIMELINE_COLS = ["mes", "data_ref", "pago_minimo", "aporte_extra_usado", "snowball_para_prox", "juros_do_mes", "saldo_total"]
+
+
+def read_records(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def read_aportes(path, months):
+    # mesma regra de aportes_to_array: meses fora do horizonte são ignorados, repetidos valem o último
+    import numpy as np
+    out = np.zeros(int(months))
+    if not path or not os.path.exists(path):
+        return out
+    for r in read_records(path):
+        try:
+            m = int(float(r["mes"]))
+        except (KeyError, TypeError, ValueError):
+            continue
+        if 1 <= m <= months:
+            try:
+                out[m - 1] = float(r.get("aporte") or 0.0)
+            except ValueError:
+                out[m - 1] = 0.0
+    return out
+
+
+def run(debts, aportes, months, motor="arrays", detalhe_dir=None):
+    import numpy as np
+    saldo = np.array([d["saldo"] for d in debts], dtype=np.float64)
+    rate_m = np.array([d["rate_m"] for d in debts], dtype=np.float64)
+    parcela = np.array([d["parcela"] for d in debts], dtype=np.float64)
+    if detalhe_dir:
+        # detalhe por dívida gravado direto em .npy mapeados em memória (motor em arrays)
+        from dividas.engine import simulate_arrays, alloc_detail
+        detalhe = alloc_detail(months, len(debts), spill_dir=detalhe_dir, spill_bytes=0)
+        res = simulate_arrays(saldo, rate_m, parcela, aportes, months, detalhe)
+        for arr in detalhe.values():
+            arr.flush()
+        return res
+    if motor == "eventos":
+        from dividas.events import simulate_events, expand_events
+        return expand_events(simulate_events(saldo, rate_m, parcela, aportes, months))
+    from dividas.engine import simulate_arrays
+    return simulate_arrays(saldo, rate_m, parcela, aportes, months)
+
+
+def write_outputs(res, debts, base_date, timeline_path, quitacao_path):
+    with open(timeline_path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(TIMELINE_COLS)
+        for i in range(res["meses"]):
+            w.writerow([i + 1, add_months(base_date, i).isoformat()] + [round(float(res[c][i]), 2) for c in TIMELINE_COLS[2:]])
+    with open(quitacao_path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["id", "nome", "quitado_em"])
+        for d, m in zip(debts, res["payoff_mes"]):
+            w.writerow([d["id"], d["nome"], add_months(base_date, int(m) - 1).isoformat() if m > 0 else ""])
+
+
+def build_parser():
+    p = argparse.ArgumentParser(prog="dividas", description="Simulador de quitação de dívidas (avalanche do orçamento) sem interface.")
+    p.add_argument("--dividas", default="dividas.csv", help="CSV de dívidas (padrão: dividas.csv)")
+    p.add_argument("--aportes", default="aportes.csv", help="CSV de aportes mensais mes,aporte (padrão: aportes.csv)")
+    p.add_argument("--inpc", type=float, default=DEFAULT_INPC_2025, help="INPC anual em %% (padrão: %(default)s)")
+    p.add_argument("--meses", type=int, default=120, help="horizonte em meses (padrão: %(default)s)")
+    p.add_argument("--base", type=date.fromisoformat, default=BASE_START.date(), help="data do 1º mês, AAAA-MM-DD (padrão: %(default)s)")
+    p.add_argument("--motor", choices=MOTORES, default="arrays", help="motor de simulação (padrão: %(default)s)")
+    p.add_argument("--timeline", default="timeline.csv", help="saída do cronograma (padrão: %(default)s)")
+    p.add_argument("--quitacao", default="quitacao.csv", help="saída das datas de quitação (padrão: %(default)s)")
+    p.add_argument("--detalhe", metavar="DIR", help="grava saldo/juros/mínimo/aporte por mês e dívida em DIR/*.npy (linhas = meses do horizonte)")
+    return p
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not os.path.exists(args.dividas):
+        print(f"Arquivo de dívidas não encontrado: {args.dividas}", file=sys.stderr)
+        return 2
+    debts = prepare_rows(read_records(args.dividas), args.inpc)
+    res = run(debts, read_aportes(args.aportes, args.meses), args.meses, args.motor, args.detalhe)
+    write_outputs(res, debts, args.base, args.timeline, args.quitacao)
+
+    n = res["meses"]
+    saldo_final = float(res["saldo_total"][n - 1]) if n else sum(d["saldo"] for d in debts)
+    status = "QUITADO" if saldo_final <= 0.01 else "NÃO QUITADO"
+    print(f"{status} — meses simulados: {n} — saldo final: R$ {saldo_final:.2f} — juros totais: R$ {float(res['juros_do_mes'].sum()):.2f}")
+    print(f"Gravados: {args.timeline}, {args.quitacao}" + (f", {args.detalhe}/*.npy" if args.detalhe else ""))
+    return 0
@@ -0,0 +1,198 @@
+import calendar
+import math
+import os
+from datetime import date, datetime
+
+# ---------------- Núcleo sem UI ----------------
+# Funções do plano de quitação que não dependem de Streamlit nem de matplotlib.
+# pandas/numpy só são importados dentro das funções que trabalham com
+# DataFrames, para que `python -m dividas` e jobs em lote subam rápido.
+
+DEFAULT_INPC_2025 = 4.7
+BASE_DAY = 20
+BASE_START = datetime(2025, 9, BASE_DAY)
+
+
+def a2m(rate_annual):
+    if rate_annual is None:
+        return 0.0
+    try:
+        rate_annual = float(rate_annual)
+    except (TypeError, ValueError):
+        return 0.0
+    if math.isnan(rate_annual):
+        return 0.0
+    return (1 + rate_annual/100.0)**(1/12) - 1
+
+
+def compute_competencia(today: date, base_day: int = 20) -> str:
+    y = today.year
+    m = today.month
+    if today.day < base_day:
+        if m == 1:
+            y -= 1
+            m = 12
+        else:
+            m -= 1
+    return f"{y:04d}-{m:02d}"
+
+
+def add_months(base_date, n):
+    # mesmo resultado de Timestamp + DateOffset(months=n): o dia é limitado ao fim do mês
+    y, m = divmod(base_date.year * 12 + (base_date.month - 1) + int(n), 12)
+    d = min(base_date.day, calendar.monthrange(y, m + 1)[1])
+    return date(y, m + 1, d)
+
+
+# ---------------- Leitura tipada dos CSVs ----------------
+# Tipos explícitos por arquivo (pelo nome) e engine pyarrow. O DataFrame lido
+# fica em cache por (caminho, mtime, tamanho): reruns do app só releem o arquivo
+# quando ele muda. Colunas "str" viram object com NaN nas células vazias, como no
+# read_csv padrão; números vazios viram NaN (Int64 admite <NA>). `prioridade` é
+# float64 porque prepare_debts trunca valores como 2.5 (Int64 recusaria o arquivo).
+
+CSV_SCHEMAS = {
+    "dividas.csv": {
+        "id": "str", "nome": "str", "tipo": "str", "saldo_atual": "float64", "parcela": "float64",
+        "juros_aa": "float64", "indexador": "str", "spread_aa": "float64", "prioridade": "float64",
+    },
+    "aportes.csv": {"mes": "Int64", "aporte": "float64"},
+    "pagamentos.csv": {"competencia": "str", "id": "str", "pago": "boolean", "data_pagamento": "str"},
+}
+
+_csv_cache = {}
+
+
+def read_typed_csv(path, schema=None, parse_dates=None):
+    import importlib.util
+    import numpy as np
+    import pandas as pd
+    schema = schema or {}
+    # pyarrow grava "None" em colunas str vazias; lê como string[pyarrow] e converte depois
+    dtype = {c: ("string[pyarrow]" if t == "str" else t) for c, t in schema.items()}
+    engine = "pyarrow" if importlib.util.find_spec("pyarrow") else "c"
+    if engine == "c":
+        dtype = {c: ("string" if t == "string[pyarrow]" else t) for c, t in dtype.items()}
+    df = pd.read_csv(path, dtype=dtype or None, parse_dates=parse_dates, engine=engine)
+    for c, t in schema.items():
+        if t == "str" and c in df.columns:
+            df[c] = df[c].astype(object).where(df[c].notna(), np.nan)
+    return df
+
+
+def load_csv_if_exists(path, dtype=None, parse_dates=None, raise_errors=False):
+    # None se o arquivo não existe; ilegível também devolve None, ou propaga o erro com raise_errors
+    import pandas as pd
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if dtype is None:
+        dtype = CSV_SCHEMAS.get(os.path.basename(path))
+    key = os.path.abspath(path)
+    versao = (st.st_mtime_ns, st.st_size, repr(dtype), repr(parse_dates))
+    hit = _csv_cache.get(key)
+    if hit is None or hit[0] != versao:
+        try:
+            df = read_typed_csv(path, dtype, parse_dates)
+        except (OSError, ValueError, TypeError, pd.errors.ParserError):
+            _csv_cache.pop(key, None)
+            if raise_errors:
+                raise
+            return None
+        hit = _csv_cache[key] = (versao, df)
+    return hit[1].copy()
+
+
+def save_csv(df, path):
+    df.to_csv(path, index=False)
+
+
+def _prioridade(v):
+    # mesma regra de prepare_debts: vazio, NaN e 0 -> 999 (o "0" do csv.DictReader é texto e seria verdadeiro)
+    p = float(v) if v is not None and str(v).strip() else 0.0
+    return (int(p) if p == p else 0) or 999
+
+
+def prepare_rows(records, inpc_aa):
+    # records: dicts com as colunas de dividas.csv (de DataFrame.to_dict ou csv.DictReader)
+    rows = []
+    for r in records:
+        if r["tipo"] == "INPC + Spread":
+            annual_rate = (inpc_aa or 0.0) + float(r.get("spread_aa", 0.0) or 0.0)
+        else:
+            annual_rate = float(r.get("juros_aa") or 0.0)
+        rows.append({
+            "id": r["id"],
+            "nome": r["nome"],
+            "tipo": r["tipo"],
+            "saldo": float(r["saldo_atual"] or 0.0),
+            "parcela": float(r["parcela"] or 0.0),
+            "rate_m": a2m(annual_rate),
+            "prioridade": _prioridade(r.get("prioridade")),
+        })
+    return sorted(rows, key=lambda x: (x["prioridade"], x["saldo"]))
+
+
+def _num_col(df, col, default=0.0):
+    # como o `float(x or 0.0)` de prepare_rows: vazio/ausente -> default, texto inválido -> ValueError
+    import numpy as np
+    import pandas as pd
+    if col not in df.columns:
+        return np.full(len(df), default, dtype=np.float64)
+    s = df[col]
+    if s.dtype == object:
+        # mask em vez de replace(regex): replace em object dispara o FutureWarning de downcasting
+        s = s.mask(s.astype(str).str.strip().eq(""))
+    return pd.to_numeric(s).astype("float64").fillna(default).to_numpy(dtype=np.float64)
+
+
+def prepare_debts(df, inpc_aa):
+    # versão em colunas de prepare_rows (mesma taxa e mesma ordem), sem laço por linha
+    import numpy as np
+    import pandas as pd
+    cols = ["id", "nome", "tipo", "saldo", "parcela", "rate_m", "prioridade"]
+    if len(df) == 0:
+        return pd.DataFrame(columns=cols)
+    tipo = df["tipo"].to_numpy(dtype=object)
+    annual = np.where(tipo == "INPC + Spread", (inpc_aa or 0.0) + _num_col(df, "spread_aa"), _num_col(df, "juros_aa"))
+    rate_m = np.where(np.isnan(annual), 0.0, (1 + annual / 100.0) ** (1 / 12) - 1)
+    saldo = _num_col(df, "saldo_atual")
+    prioridade = np.trunc(_num_col(df, "prioridade", 999.0)).astype(np.int64)
+    prioridade[prioridade == 0] = 999  # `0 or 999` em prepare_rows
+    ordem = np.lexsort((saldo, prioridade))
+    return pd.DataFrame({
+        "id": df["id"].to_numpy(dtype=object)[ordem],
+        "nome": df["nome"].to_numpy(dtype=object)[ordem],
+        "tipo": tipo[ordem],
+        "saldo": saldo[ordem],
+        "parcela": _num_col(df, "parcela")[ordem],
+        "rate_m": rate_m[ordem],
+        "prioridade": prioridade[ordem],
+    }, columns=cols)
+
+
+def simulate(debts_df, aportes_df, months, base_date):
+    from dividas.engine import simulate_vectorized
+    return simulate_vectorized(debts_df, aportes_df, months, base_date)
+
+
+def make_aportes_constantes(v, n):
+    import pandas as pd
+    return pd.DataFrame({"mes": list(range(1, int(n)+1)), "aporte": [float(v)]*int(n)})
+
+
+def run_and_summarize(dividas_local, aporte_const, inpc, months, base_date=BASE_START, simulate_fn=simulate, prepare_fn=prepare_debts):
+    debts = prepare_fn(dividas_local, inpc)
+    ap = make_aportes_constantes(aporte_const, months)
+    timeline, payoff, _ = simulate_fn(debts, ap, months, base_date)
+    meses_quit = int(timeline["mes"].iloc[-1])
+    saldo_final = float(timeline["saldo_total"].iloc[-1])
+    quitou = saldo_final <= 0.01
+    return {
+        "timeline": timeline,
+        "payoff": payoff,
+        "meses_quitacao": meses_quit,
+        "saldo_final": saldo_final,
+        "status": "QUITADO" if quitou else "NÃO QUITADO"
+    }
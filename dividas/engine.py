@@ -0,0 +1,252 @@
+import numpy as np
+
+from dividas.core import add_months
+
+# ---------------- Motor vetorizado (NumPy) ----------------
+# Mesmo algoritmo do `simulate` original (juros -> mínimos -> cascata do aporte
+# pela prioridade -> snowball das parcelas liberadas), mas com saldo, rate_m e
+# parcela em arrays contíguos na ordem de prioridade já definida em prepare_debts.
+# O núcleo só usa NumPy; pandas é importado nos adaptadores de DataFrame.
+
+
+def debts_to_arrays(debts_df):
+    saldo = np.ascontiguousarray(debts_df["saldo"].to_numpy(dtype=np.float64))
+    rate_m = np.ascontiguousarray(debts_df["rate_m"].to_numpy(dtype=np.float64))
+    parcela = np.ascontiguousarray(debts_df["parcela"].to_numpy(dtype=np.float64))
+    return saldo.copy(), rate_m, parcela
+
+
+def aportes_to_array(aportes_df, months):
+    import pandas as pd
+    out = np.zeros(int(months), dtype=np.float64)
+    if aportes_df is None or len(aportes_df) == 0:
+        return out
+    mes = pd.to_numeric(aportes_df["mes"], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    val = pd.to_numeric(aportes_df["aporte"], errors="coerce").fillna(0.0).to_numpy(dtype=np.float64, na_value=0.0)
+    ok = ~np.isnan(mes) & (mes >= 1) & (mes <= months)
+    # meses repetidos: vale o último, como no dict(zip(mes, aporte)) do simulate antigo
+    out[mes[ok].astype(np.int64) - 1] = val[ok]
+    return out
+
+
+def a2m_array(rate_annual):
+    return (1.0 + np.asarray(rate_annual, dtype=np.float64) / 100.0) ** (1.0 / 12.0) - 1.0
+
+
+def simulate_batch(saldo, rate_m, parcela, aportes, months, detalhe=None, snowball0=None, payoff0=None, pagou=None,
+                   direcionado=None):
+    # Versão em lote: S cenários x N dívidas, todos avançando juntos mês a mês.
+    # saldo/rate_m/parcela: (N,) ou (S, N); aportes: (T,) ou (S, T).
+    # rate_m também aceita (S, T, N) quando a taxa varia mês a mês (ex.: caminhos de INPC).
+    # Um cenário que zera o saldo total fica congelado, como o `break` do laço simples.
+    # detalhe (só com S=1): matrizes (meses, N) de alloc_detail, preenchidas linha a linha.
+    # snowball0/payoff0 retomam uma simulação no meio: snowball acumulado e dívidas já quitadas (!= 0),
+    # que voltam em payoff_mes como -1.
+    # pagou (T, N) ou (S, T, N), bool: a parcela do mês só é paga onde True; onde False a
+    # dívida acumula os juros do mês sem pagamento (replay do livro de pagamentos).
+    # direcionado = (mes, divida, valor), cada um (S,): pagamento extra pontual do cenário s
+    # na dívida `divida` (índice da coluna) no mês `mes`, depois da cascata (limitado ao saldo).
+    months = int(months)
+    aportes = np.atleast_2d(np.asarray(aportes, dtype=np.float64))
+    S = aportes.shape[0]
+    saldo = np.array(np.broadcast_to(np.asarray(saldo, dtype=np.float64), (S, np.shape(saldo)[-1])))
+    N = saldo.shape[1]
+    rate_m = np.asarray(rate_m, dtype=np.float64)
+    por_mes = rate_m.ndim == 3
+    if not por_mes:
+        rate_m = np.broadcast_to(rate_m, (S, N))
+    parcela = np.broadcast_to(np.asarray(parcela, dtype=np.float64), (S, N))
+    if aportes.shape[1] < months:
+        aportes = np.pad(aportes, ((0, 0), (0, months - aportes.shape[1])))
+
+    pago_minimo = np.zeros((S, months))
+    aporte_usado = np.zeros((S, months))
+    snowball = np.zeros((S, months))
+    juros = np.zeros((S, months))
+    saldo_total = np.zeros((S, months))
+    juros_divida = np.zeros((S, N))
+    payoff_mes = np.zeros((S, N), dtype=np.int64)  # 0 = não quitada
+    if payoff0 is not None:
+        payoff_mes[:] = np.where(np.asarray(payoff0) != 0, -1, 0)
+    meses = np.zeros(S, dtype=np.int64)
+
+    snowball_extra = np.zeros(S) if snowball0 is None else np.array(np.broadcast_to(snowball0, (S,)), dtype=np.float64)
+    vivo = np.ones(S, dtype=bool)
+    for m in range(1, months + 1):
+        i = m - 1
+        ativo = (saldo > 0.0) & vivo[:, None]
+        juros_d = np.where(ativo, saldo * (rate_m[:, i, :] if por_mes else rate_m), 0.0)
+        juros_divida += juros_d
+        saldo1 = saldo + juros_d
+        pago = np.where(ativo, np.minimum(parcela, saldo1), 0.0)
+        if pagou is not None:
+            pago = np.where(pagou[..., i, :], pago, 0.0)
+        saldo = np.where(ativo, np.maximum(0.0, saldo1 - pago), saldo)
+
+        # cascata do aporte: cada dívida recebe o que sobra depois das anteriores
+        aporte = np.where(vivo, aportes[:, i] + snowball_extra, 0.0)
+        devido = np.where(saldo > 0.0, saldo, 0.0)
+        antes = np.cumsum(devido, axis=1) - devido
+        pago_extra = np.clip(aporte[:, None] - antes, 0.0, devido)
+        saldo = saldo - pago_extra
+        if direcionado is not None:
+            sel = np.flatnonzero((direcionado[0] == m) & vivo)
+            if sel.size:
+                col = direcionado[1][sel]
+                extra = np.minimum(direcionado[2][sel], saldo[sel, col])
+                saldo[sel, col] -= extra
+                pago_extra[sel, col] += extra
+
+        novas = (saldo <= 0.0) & (payoff_mes == 0) & vivo[:, None]
+        payoff_mes[novas] = m
+        snowball_extra = snowball_extra + np.where(novas, parcela, 0.0).sum(axis=1)
+
+        if detalhe is not None:
+            detalhe["saldo"][i] = saldo[0]
+            detalhe["juros"][i] = juros_d[0]
+            detalhe["pagamento_minimo"][i] = pago[0]
+            detalhe["aporte_aplicado"][i] = pago_extra[0]
+
+        pago_minimo[:, i] = pago.sum(axis=1)
+        aporte_usado[:, i] = pago_extra.sum(axis=1)
+        snowball[:, i] = snowball_extra
+        juros[:, i] = juros_d.sum(axis=1)
+        saldo_total[:, i] = saldo.sum(axis=1)
+        meses[vivo] = m
+        vivo &= saldo_total[:, i] > 0.01
+        if not vivo.any():
+            break
+
+    n = int(meses.max()) if S else 0
+    return {
+        "meses": meses,
+        "pago_minimo": pago_minimo[:, :n],
+        "aporte_extra_usado": aporte_usado[:, :n],
+        "snowball_para_prox": snowball[:, :n],
+        "juros_do_mes": juros[:, :n],
+        "saldo_total": saldo_total[:, :n],
+        "juros_divida": juros_divida,
+        "payoff_mes": payoff_mes,
+        "saldo_final": saldo,
+    }
+
+
+def simulate_arrays(saldo, rate_m, parcela, aportes, months, detalhe=None, snowball0=None, payoff0=None, pagou=None):
+    res = simulate_batch(saldo, rate_m, parcela, np.asarray(aportes, dtype=np.float64)[None, :], months, detalhe, snowball0, payoff0, pagou)
+    n = int(res["meses"][0])
+    por_divida = ("juros_divida", "payoff_mes", "saldo_final")
+    out = {k: v[0, :n] for k, v in res.items() if k != "meses" and k not in por_divida}
+    out.update({k: res[k][0] for k in por_divida}, meses=n)
+    if detalhe is not None:
+        out["detalhe"] = {k: v[:n] for k, v in detalhe.items()}
+    return out
+
+
+# ---------------- Detalhe por dívida (meses x dívidas) ----------------
+# Matrizes float64 pré-alocadas em ordem de coluna (Fortran): a série de cada
+# dívida fica contígua, então DataFrame e Arrow embrulham os dados sem cópia.
+# Acima de `spill_bytes` (ou sempre, com spill_bytes=0) viram .npy mapeados em
+# memória em `spill_dir`, para horizontes longos e carteiras grandes.
+
+DETALHE_CAMPOS = ("saldo", "juros", "pagamento_minimo", "aporte_aplicado")
+DETALHE_SPILL_BYTES = 256 * 1024 * 1024
+
+
+def alloc_detail(months, n_debts, spill_dir=None, spill_bytes=DETALHE_SPILL_BYTES):
+    shape = (int(months), int(n_debts))
+    total = 8 * shape[0] * shape[1] * len(DETALHE_CAMPOS)
+    if spill_dir is not None and total >= spill_bytes:
+        import os
+        os.makedirs(spill_dir, exist_ok=True)
+        return {
+            c: np.lib.format.open_memmap(os.path.join(spill_dir, f"{c}.npy"), mode="w+", dtype=np.float64, shape=shape, fortran_order=True)
+            for c in DETALHE_CAMPOS
+        }
+    return {c: np.zeros(shape, dtype=np.float64, order="F") for c in DETALHE_CAMPOS}
+
+
+def detail_frame(detalhe, campo, ids):
+    import pandas as pd
+    arr = detalhe[campo]
+    return pd.DataFrame(arr, columns=list(ids), index=pd.RangeIndex(1, arr.shape[0] + 1, name="mes"), copy=False)
+
+
+def detail_arrow(detalhe, campo, ids):
+    import pyarrow as pa
+    arr = detalhe[campo]
+    return pa.table({str(d): pa.array(arr[:, j]) for j, d in enumerate(ids)})
+
+
+def timeline_from_arrays(res, base_date):
+    n = res["meses"]
+    meses = np.arange(1, n + 1)
+    import pandas as pd
+    datas = [add_months(base_date, int(m) - 1).isoformat() for m in meses]
+    return pd.DataFrame({
+        "mes": meses,
+        "data_ref": datas,
+        "pago_minimo": np.round(res["pago_minimo"], 2),
+        "aporte_extra_usado": np.round(res["aporte_extra_usado"], 2),
+        "snowball_para_prox": np.round(res["snowball_para_prox"], 2),
+        "juros_do_mes": np.round(res["juros_do_mes"], 2),
+        "saldo_total": np.round(res["saldo_total"], 2),
+    })
+
+
+def payoff_from_arrays(debts_df, payoff_mes, base_date):
+    import pandas as pd
+    quitado = [add_months(base_date, int(m) - 1).isoformat() if m > 0 else None for m in payoff_mes]
+    return pd.DataFrame({"id": debts_df["id"].to_numpy(), "nome": debts_df["nome"].to_numpy(), "quitado_em": quitado})
+
+
+def simulate_vectorized(debts_df, aportes_df, months, base_date, detalhe=None):
+    saldo, rate_m, parcela = debts_to_arrays(debts_df)
+    aportes = aportes_to_array(aportes_df, months)
+    res = simulate_arrays(saldo, rate_m, parcela, aportes, months, detalhe)
+    debts = debts_df.copy()
+    debts["saldo"] = res["saldo_final"]
+    out = (timeline_from_arrays(res, base_date), payoff_from_arrays(debts_df, res["payoff_mes"], base_date), debts)
+    return out + (res["detalhe"],) if detalhe is not None else out
+
+
+# ---------------- Grade de cenários (aporte x INPC) ----------------
+def inpc_parts(debts_df):
+    # Espera debts_df preparado com inpc_aa=0, de modo que a taxa das dívidas
+    # "INPC + Spread" é só o spread; as demais não dependem do INPC.
+    rate_m = debts_df["rate_m"].to_numpy(dtype=np.float64)
+    indexada = (debts_df["tipo"] == "INPC + Spread").to_numpy()
+    spread_aa = ((1.0 + rate_m) ** 12 - 1.0) * 100.0
+    return rate_m, indexada, spread_aa
+
+
+def rates_from_inpc(rate_m, indexada, spread_aa, inpc_values):
+    # inpc_values de qualquer forma (I,), (S, T)... -> mesma forma + (N,)
+    inpc = np.asarray(inpc_values, dtype=np.float64)[..., None]
+    return np.where(indexada, a2m_array(inpc + spread_aa), rate_m)
+
+
+def inpc_rate_matrix(debts_df, inpc_values):
+    return rates_from_inpc(*inpc_parts(debts_df), inpc_values)
+
+
+def scenario_grid(debts_df, aporte_values, inpc_values, months):
+    aporte_values = np.asarray(aporte_values, dtype=np.float64)
+    inpc_values = np.asarray(inpc_values, dtype=np.float64)
+    A, I = aporte_values.size, inpc_values.size
+    saldo, _, parcela = debts_to_arrays(debts_df)
+    rates = inpc_rate_matrix(debts_df, inpc_values)
+    # cenário s = a * I + i
+    rate_m = np.tile(rates, (A, 1))
+    aportes = np.repeat(np.repeat(aporte_values, I)[:, None], int(months), axis=1)
+    res = simulate_batch(saldo, rate_m, parcela, aportes, months)
+    saldo_final = res["saldo_final"].sum(axis=1)
+    quitou = saldo_final <= 0.01
+    meses = res["meses"].astype(np.float64)
+    return {
+        "aporte": aporte_values,
+        "inpc": inpc_values,
+        "meses_quitacao": np.where(quitou, meses, np.nan).reshape(A, I),
+        "juros_total": res["juros_do_mes"].sum(axis=1).reshape(A, I),
+        "saldo_final": saldo_final.reshape(A, I),
+        "quitou": quitou.reshape(A, I),
+    }
@@ -0,0 +1,152 @@
+import numpy as np
+
+from dividas.engine import debts_to_arrays, aportes_to_array, timeline_from_arrays, payoff_from_arrays
+
+# ---------------- Motor por eventos (forma fechada) ----------------
+# Entre dois eventos de quitação a alocação não muda: toda dívida ativa paga a
+# parcela cheia e a primeira ativa na prioridade absorve aporte + snowball.
+# Cada saldo segue então s_{t+1} = s_t (1 + r) - P, com solução fechada
+#   s_k = (s_0 - P/r) (1 + r)^k + P/r
+# e o motor salta direto até o mês anterior ao próximo evento (quitação ou
+# mudança de valor em aportes_df), andando mês a mês só nesses meses de evento.
+# O cronograma mensal só é montado em expand_events, quando alguém precisa dele.
+
+
+def _months_to_zero(s, r, P):
+    # menor k >= 1 com s_k <= 0; inf quando o pagamento não cobre os juros
+    k = np.full(s.shape, np.inf)
+    r_pos = (r > 0.0) & (P > s * r)
+    r_zero = (r <= 0.0) & (P > 0.0)
+    r_safe = np.where(r_pos, r, 1.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        k_pos = np.ceil(np.log(P / (P - s * r_safe)) / np.log1p(r_safe))
+        k_zero = np.ceil(s / np.where(r_zero, P, 1.0))
+    k = np.where(r_pos, k_pos, k)
+    k = np.where(r_zero, k_zero, k)
+    return np.maximum(k, 1.0)
+
+
+def _advance(s, r, P, t):
+    # saldo após t meses de s_{t+1} = s_t (1 + r) - P; t pode ser um array (broadcast)
+    r_safe = np.where(r > 0.0, r, 1.0)
+    fechado = (s - P / r_safe) * (1.0 + r_safe) ** t + P / r_safe
+    return np.where(r > 0.0, fechado, s - t * P)
+
+
+def _runs_end(aportes):
+    # fim[i] = último índice do trecho de aportes iguais que contém i
+    n = aportes.size
+    fim = np.empty(n, dtype=np.int64)
+    muda = np.flatnonzero(np.diff(aportes) != 0.0)
+    ends = np.append(muda, n - 1)
+    starts = np.insert(muda + 1, 0, 0)
+    for a, b in zip(starts, ends):
+        fim[a:b + 1] = b
+    return fim
+
+
+def simulate_events(saldo, rate_m, parcela, aportes, months):
+    s = np.array(saldo, dtype=np.float64)
+    r = np.asarray(rate_m, dtype=np.float64)
+    parcela = np.asarray(parcela, dtype=np.float64)
+    months = int(months)
+    aportes = np.asarray(aportes, dtype=np.float64)[:months]
+    if aportes.size < months:
+        aportes = np.pad(aportes, (0, months - aportes.size))
+    fim_run = _runs_end(aportes) if months else np.zeros(0, dtype=np.int64)
+
+    payoff_mes = np.zeros(s.size, dtype=np.int64)
+    juros_divida = np.zeros(s.size)
+    segmentos = []
+    snowball_extra = 0.0
+    m = 1
+    meses = 0
+    while m <= months:
+        ativo = s > 0.0
+        A = max(0.0, float(aportes[m - 1]) + snowball_extra)
+        P = np.where(ativo, parcela, 0.0)
+        if ativo.any():
+            P[np.argmax(ativo)] += A
+        k = _months_to_zero(s[ativo], r[ativo], P[ativo]).min() if ativo.any() else 1.0
+        # margem de um mês antes do evento: o mês do evento e o anterior vão pelo passo exato
+        limite = min(int(fim_run[m - 1]) - m + 2, months - m + 1)
+        salto = int(min(k - 2.0, limite)) if np.isfinite(k) else limite
+        if m > 1 and salto >= 1:
+            s_fim = np.where(ativo, _advance(s, r, P, salto), s)
+            juros_divida += np.where(ativo, s_fim - s + salto * P, 0.0)
+            segmentos.append(("salto", m, salto, s.copy(), P, ativo, A, snowball_extra))
+            s = s_fim
+            m += salto
+            meses = m - 1
+            continue
+
+        # passo exato de um mês, idêntico ao de simulate_batch
+        juros_d = np.where(ativo, s * r, 0.0)
+        juros_divida += juros_d
+        s1 = s + juros_d
+        pago = np.where(ativo, np.minimum(parcela, s1), 0.0)
+        s = np.where(ativo, np.maximum(0.0, s1 - pago), s)
+        aporte = float(aportes[m - 1]) + snowball_extra
+        extra_used = 0.0
+        if aporte > 0.0:
+            devido = np.where(s > 0.0, s, 0.0)
+            antes = np.cumsum(devido) - devido
+            pago_extra = np.clip(aporte - antes, 0.0, devido)
+            s = s - pago_extra
+            extra_used = float(pago_extra.sum())
+        novas = (s <= 0.0) & (payoff_mes == 0)
+        payoff_mes[novas] = m
+        snowball_extra += float(parcela[novas].sum())
+        saldo_total = float(s.sum())
+        segmentos.append(("passo", m, float(pago.sum()), extra_used, snowball_extra, float(juros_d.sum()), saldo_total))
+        meses = m
+        m += 1
+        if saldo_total <= 0.01:
+            break
+
+    return {
+        "meses": meses,
+        "payoff_mes": payoff_mes,
+        "saldo_final": s,
+        "juros_divida": juros_divida,
+        "juros_total": float(juros_divida.sum()),
+        "passos": sum(1 for seg in segmentos if seg[0] == "passo"),
+        "segmentos": segmentos,
+        "rate_m": r,
+    }
+
+
+def expand_events(res):
+    # monta as séries mensais (mesmo formato de simulate_arrays) a partir dos segmentos
+    n = res["meses"]
+    cols = {k: np.zeros(n) for k in ("pago_minimo", "aporte_extra_usado", "snowball_para_prox", "juros_do_mes", "saldo_total")}
+    r = res["rate_m"]
+    for seg in res["segmentos"]:
+        if seg[0] == "passo":
+            _, m, pago, extra, snow, juros, total = seg
+            i = m - 1
+            cols["pago_minimo"][i] = pago
+            cols["aporte_extra_usado"][i] = extra
+            cols["snowball_para_prox"][i] = snow
+            cols["juros_do_mes"][i] = juros
+            cols["saldo_total"][i] = total
+            continue
+        _, m, salto, s0, P, ativo, A, snow = seg
+        t = np.arange(0, salto + 1)[:, None]
+        trilha = np.where(ativo, _advance(s0, r, P, t), s0)  # (salto + 1, N), linha 0 = início
+        sl = slice(m - 1, m - 1 + salto)
+        cols["pago_minimo"][sl] = (P.sum() - A) if ativo.any() else 0.0
+        cols["aporte_extra_usado"][sl] = A if ativo.any() else 0.0
+        cols["snowball_para_prox"][sl] = snow
+        cols["juros_do_mes"][sl] = (np.where(ativo, trilha[:-1] * r, 0.0)).sum(axis=1)
+        cols["saldo_total"][sl] = trilha[1:].sum(axis=1)
+    cols.update(meses=n, payoff_mes=res["payoff_mes"], saldo_final=res["saldo_final"], juros_divida=res["juros_divida"])
+    return cols
+
+
+def simulate_event_driven(debts_df, aportes_df, months, base_date):
+    saldo, rate_m, parcela = debts_to_arrays(debts_df)
+    res = expand_events(simulate_events(saldo, rate_m, parcela, aportes_to_array(aportes_df, months), months))
+    debts = debts_df.copy()
+    debts["saldo"] = res["saldo_final"]
+    return timeline_from_arrays(res, base_date), payoff_from_arrays(debts_df, res["payoff_mes"], base_date), debts
@@ -0,0 +1,63 @@
+import io
+import zipfile
+
+# ---------------- Exportação em memória ----------------
+# As planilhas são montadas num BytesIO (nada é gravado no diretório de
+# trabalho) e só quando o usuário pede o download. No XLSX o xlsxwriter roda em
+# constant_memory: cada linha é gravada uma vez, em ordem, e descarregada em
+# seguida. Por isso as linhas são escritas aqui e não via DataFrame.to_excel,
+# que preenche as células coluna a coluna. Para saídas grandes com muitos
+# cenários há o formato Parquet (um arquivo por tabela, dentro de um .zip).
+
+FORMATOS = ("xlsx", "parquet")
+MIME = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "parquet": "application/zip",
+}
+
+
+def _cell(v):
+    # xlsxwriter não aceita NaN/NaT; célula vazia
+    if v is None:
+        return None
+    try:
+        if v != v:
+            return None
+    except (TypeError, ValueError):
+        return None
+    if hasattr(v, "item"):  # escalares NumPy
+        return v.item()
+    return v
+
+
+def excel_bytes(sheets):
+    import xlsxwriter
+    buf = io.BytesIO()
+    wb = xlsxwriter.Workbook(buf, {"constant_memory": True, "nan_inf_to_errors": True})
+    try:
+        for nome, df in sheets.items():
+            ws = wb.add_worksheet(nome[:31])
+            ws.write_row(0, 0, [str(c) for c in df.columns])
+            for i, row in enumerate(df.itertuples(index=False, name=None), start=1):
+                ws.write_row(i, 0, [_cell(v) for v in row])
+    finally:
+        wb.close()
+    return buf.getvalue()
+
+
+def parquet_zip_bytes(sheets):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_STORED) as zf:
+        for nome, df in sheets.items():
+            out = io.BytesIO()
+            pq.write_table(pa.Table.from_pandas(df, preserve_index=False), out, compression="zstd")
+            zf.writestr(f"{nome}.parquet", out.getvalue())
+    return buf.getvalue()
+
+
+def export_bytes(sheets, formato="xlsx"):
+    if formato == "parquet":
+        return parquet_zip_bytes(sheets)
+    return excel_bytes(sheets)
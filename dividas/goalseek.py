@@ -0,0 +1,117 @@
+import math
+
+import numpy as np
+
+from dividas.engine import debts_to_arrays, inpc_parts, rates_from_inpc, simulate_batch
+
+# ---------------- Busca de meta (goal seek) ----------------
+# Acha o menor aporte mensal constante (ou o maior INPC) que ainda cumpre a meta:
+# quitar tudo até o mês `prazo` e/ou pagar no máximo `juros_max` de juros no
+# horizonte. Mais aporte nunca atrasa a quitação nem aumenta juros, e mais INPC
+# nunca adianta, então a meta é monotônica no valor procurado. A busca mantém um
+# intervalo [lo, hi] com a fronteira dentro e, a cada iteração, simula de uma
+# vez `candidatos` pontos internos (uma linha de simulate_batch cada), o que
+# divide o intervalo por candidatos + 1 por rodada.
+
+CANDIDATOS = 31
+TOL_APORTE = 0.01  # centavo
+TOL_INPC = 1e-4  # p.p. a.a.
+INPC_MAX = 100.0
+
+
+def _meta(res, prazo, juros_max):
+    ok = res["saldo_final"].sum(axis=1) <= 0.01
+    if prazo is not None:
+        ok &= res["meses"] <= int(prazo)
+    if juros_max is not None:
+        ok &= res["juros_do_mes"].sum(axis=1) <= float(juros_max) + 1e-9
+    return ok
+
+
+def _fronteira(avaliar, lo, hi, tol, crescente, candidatos=CANDIDATOS):
+    # crescente: meta falha em lo e vale em hi (procura o menor valor que cumpre);
+    # senão o contrário (procura o maior). Devolve (valor na grade de tol, iterações, avaliados).
+    iteracoes = avaliados = 0
+    while hi - lo > tol:
+        xs = np.linspace(lo, hi, candidatos + 2)[1:-1]
+        ok = avaliar(xs)
+        iteracoes += 1
+        avaliados += xs.size
+        muda = ok if crescente else ~ok
+        j = int(np.argmax(muda)) if muda.any() else xs.size
+        if j < xs.size:
+            hi = float(xs[j])
+        if j > 0:
+            lo = float(xs[j - 1])
+    # último passo na grade de `tol` (centavos, 0,0001 p.p.): os pontos entre lo e hi
+    k = np.arange(math.floor(round(lo / tol, 6)), math.ceil(round(hi / tol, 6)) + 1)
+    xs = np.round(k * tol, 10)
+    ok = avaliar(xs)
+    avaliados += xs.size
+    if crescente:
+        return float(xs[np.argmax(ok)]), iteracoes, avaliados
+    return float(xs[xs.size - 1 - np.argmax(ok[::-1])]), iteracoes, avaliados
+
+
+def _resumo(res, i):
+    quitou = bool(res["saldo_final"][i].sum() <= 0.01)
+    return {
+        "meses": int(res["meses"][i]) if quitou else None,
+        "juros_total": float(res["juros_do_mes"][i].sum()),
+    }
+
+
+def solve_aporte(debts_df, months, prazo=None, juros_max=None, tol=TOL_APORTE):
+    # Menor aporte constante (R$/mês) que cumpre a meta; debts_df preparado (INPC já aplicado).
+    if prazo is None and juros_max is None:
+        raise ValueError("informe prazo e/ou juros_max")
+    saldo, rate_m, parcela = debts_to_arrays(debts_df)
+    months = int(months) if prazo is None else min(int(months), int(prazo))
+
+    def simular(valores):
+        return simulate_batch(saldo, rate_m, parcela, np.repeat(np.asarray(valores)[:, None], months, axis=1), months)
+
+    def avaliar(valores):
+        return _meta(simular(valores), prazo, juros_max)
+
+    # com aporte = saldo + juros do 1º mês tudo quita no mês 1
+    hi = float(np.sum(saldo * (1.0 + rate_m))) + 1.0
+    ends = simular([0.0, hi])
+    ok = _meta(ends, prazo, juros_max)
+    if ok[0]:
+        return {"viavel": True, "valor": 0.0, "iteracoes": 0, "avaliados": 2, **_resumo(ends, 0)}
+    if not ok[1]:
+        return {"viavel": False, "valor": None, "iteracoes": 0, "avaliados": 2, **_resumo(ends, 1)}
+    valor, it, n = _fronteira(avaliar, 0.0, hi, tol, crescente=True)
+    final = simular([valor])
+    return {"viavel": True, "valor": valor, "iteracoes": it, "avaliados": n + 3, **_resumo(final, 0)}
+
+
+def solve_inpc(debts_df, aportes, months, prazo=None, juros_max=None, inpc_min=0.0, inpc_max=INPC_MAX, tol=TOL_INPC):
+    # Maior INPC a.a. (%) que o plano tolera; debts_df preparado com inpc_aa=0
+    # (como em scenario_grid) e aportes como array (T,).
+    if prazo is None and juros_max is None:
+        raise ValueError("informe prazo e/ou juros_max")
+    saldo, _, parcela = debts_to_arrays(debts_df)
+    partes = inpc_parts(debts_df)
+    months = int(months) if prazo is None else min(int(months), int(prazo))
+    aportes = np.asarray(aportes, dtype=np.float64)[:months]
+
+    def simular(valores):
+        valores = np.asarray(valores, dtype=np.float64)
+        rate_m = rates_from_inpc(*partes, valores)
+        return simulate_batch(saldo, rate_m, parcela, np.broadcast_to(aportes, (valores.size, aportes.size)), months)
+
+    def avaliar(valores):
+        return _meta(simular(valores), prazo, juros_max)
+
+    ends = simular([inpc_min, inpc_max])
+    ok = _meta(ends, prazo, juros_max)
+    if not ok[0]:
+        return {"viavel": False, "valor": None, "limite": False, "iteracoes": 0, "avaliados": 2, **_resumo(ends, 0)}
+    if ok[1]:
+        # a meta vale em todo o intervalo (ex.: nenhuma dívida indexada ao INPC)
+        return {"viavel": True, "valor": float(inpc_max), "limite": True, "iteracoes": 0, "avaliados": 2, **_resumo(ends, 1)}
+    valor, it, n = _fronteira(avaliar, float(inpc_min), float(inpc_max), tol, crescente=False)
+    final = simular([valor])
+    return {"viavel": True, "valor": valor, "limite": False, "iteracoes": it, "avaliados": n + 3, **_resumo(final, 0)}
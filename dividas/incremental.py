@@ -0,0 +1,116 @@
+import hashlib
+
+import numpy as np
+
+from dividas.engine import (
+    alloc_detail, aportes_to_array, debts_to_arrays, payoff_from_arrays, simulate_arrays, timeline_from_arrays,
+)
+
+# ---------------- Re-simulação incremental ----------------
+# Guarda o estado de cada mês da última simulação e, na próxima chamada,
+# recalcula só a partir do primeiro mês em que as entradas mudaram:
+#   - dívidas (saldo, rate_m, parcela) diferentes -> desde o mês 1;
+#   - aporte diferente no mês k -> desde o mês k;
+#   - horizonte maior -> só os meses novos (se ainda não tinha quitado tudo).
+# O estado no início do mês k sai das matrizes de detalhe (saldo ao fim do
+# mês k-1), da série snowball_para_prox e das datas de quitação anteriores a k.
+
+SERIES = ("pago_minimo", "aporte_extra_usado", "snowball_para_prox", "juros_do_mes", "saldo_total")
+
+
+def _debts_key(saldo, rate_m, parcela):
+    h = hashlib.blake2b(digest_size=16)
+    h.update(np.int64(np.size(saldo)).tobytes())
+    for a in (saldo, rate_m, parcela):
+        h.update(np.ascontiguousarray(a, dtype=np.float64).tobytes())
+    return h.digest()
+
+
+class IncrementalSimulator:
+    def __init__(self):
+        self._estado = None
+        self.ultimo_inicio = None  # mês a partir do qual a última chamada recalculou (None = nada)
+
+    def _resume_month(self, chave, aportes, months):
+        st = self._estado
+        if st is None or st["chave"] != chave:
+            return 1
+        L = min(aportes.size, st["aportes"].size)
+        diff = np.flatnonzero(aportes[:L] != st["aportes"][:L])
+        r = int(diff[0]) + 1 if diff.size else L + 1
+        if st["terminou"]:
+            # depois da quitação total os aportes não mudam mais nada
+            r = r if r <= st["meses"] else None
+        else:
+            r = min(r, st["meses"] + 1)
+        return r if r is not None and r <= months else None
+
+    def run(self, saldo, rate_m, parcela, aportes, months):
+        months = int(months)
+        saldo = np.asarray(saldo, dtype=np.float64)
+        aportes = np.asarray(aportes, dtype=np.float64)[:months]
+        if aportes.size < months:
+            aportes = np.pad(aportes, (0, months - aportes.size))
+        chave = _debts_key(saldo, rate_m, parcela)
+        r = self._resume_month(chave, aportes, months)
+        self.ultimo_inicio = r
+        if r is None:
+            return self._resultado(min(months, self._estado["meses"]))
+
+        antigo = self._estado if r > 1 else None
+        if antigo is not None and antigo["detalhe"]["saldo"].shape[0] >= months:
+            detalhe, series = antigo["detalhe"], antigo["series"]
+        else:
+            detalhe = alloc_detail(months, saldo.size)
+            series = {k: np.zeros(months) for k in SERIES}
+            if antigo is not None:
+                for k in detalhe:
+                    detalhe[k][:r - 1] = antigo["detalhe"][k][:r - 1]
+                for k in series:
+                    series[k][:r - 1] = antigo["series"][k][:r - 1]
+
+        if antigo is None:
+            saldo_r, snowball_r, payoff0 = saldo, 0.0, np.zeros(saldo.size, dtype=np.int64)
+        else:
+            saldo_r = np.array(detalhe["saldo"][r - 2])
+            snowball_r = float(series["snowball_para_prox"][r - 2])
+            payoff0 = np.where((antigo["payoff"] > 0) & (antigo["payoff"] < r), antigo["payoff"], 0)
+
+        res = simulate_arrays(
+            saldo_r, rate_m, parcela, aportes[r - 1:], months - r + 1,
+            detalhe={k: v[r - 1:] for k, v in detalhe.items()}, snowball0=snowball_r, payoff0=payoff0,
+        )
+        n = r - 1 + res["meses"]
+        for k in SERIES:
+            series[k][r - 1:n] = res[k]
+        self._estado = {
+            "chave": chave,
+            "aportes": aportes.copy(),
+            "meses": n,
+            "terminou": bool(n and series["saldo_total"][n - 1] <= 0.01),
+            "payoff": np.where(res["payoff_mes"] > 0, res["payoff_mes"] + r - 1, payoff0),
+            "saldo_inicial": saldo.copy(),
+            "detalhe": detalhe,
+            "series": series,
+        }
+        return self._resultado(n)
+
+    def _resultado(self, n):
+        st = self._estado
+        out = {k: st["series"][k][:n] for k in SERIES}
+        out.update(
+            meses=n,
+            payoff_mes=np.where(st["payoff"] <= n, st["payoff"], 0),
+            saldo_final=np.array(st["detalhe"]["saldo"][n - 1]) if n else st["saldo_inicial"].copy(),
+            juros_divida=st["detalhe"]["juros"][:n].sum(axis=0),
+            detalhe={k: v[:n] for k, v in st["detalhe"].items()},
+        )
+        return out
+
+
+def simulate_incremental(sim, debts_df, aportes_df, months, base_date):
+    saldo, rate_m, parcela = debts_to_arrays(debts_df)
+    res = sim.run(saldo, rate_m, parcela, aportes_to_array(aportes_df, months), months)
+    debts = debts_df.copy()
+    debts["saldo"] = res["saldo_final"]
+    return timeline_from_arrays(res, base_date), payoff_from_arrays(debts_df, res["payoff_mes"], base_date), debts
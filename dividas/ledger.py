@@ -0,0 +1,136 @@
+import csv
+import os
+import sqlite3
+from contextlib import closing
+
+# ---------------- Livro de pagamentos (SQLite) ----------------
+# Substitui a regravação completa de pagamentos.csv a cada clique: cada
+# competência é lida com uma consulta pela chave (competencia, id) e salva com
+# upsert só das suas linhas. Na primeira abertura o CSV antigo é migrado.
+# meta.versao sobe a cada gravação: quem deriva algo do livro inteiro (replay do
+# realizado) usa a versão como chave de cache em vez de reler o histórico.
+
+LEDGER_PATH = "pagamentos.sqlite"
+LEGACY_CSV_PATH = "pagamentos.csv"
+LEDGER_COLS = ["competencia", "id", "pago", "data_pagamento"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pagamentos (
+    competencia TEXT NOT NULL,
+    id TEXT NOT NULL,
+    pago INTEGER NOT NULL DEFAULT 0,
+    data_pagamento TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (competencia, id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor TEXT);
+"""
+
+_prontos = set()
+
+
+def _as_bool(v):
+    if isinstance(v, str):
+        return v.strip().lower() in ("true", "1", "sim", "yes")
+    try:
+        return bool(v) and v == v  # NaN -> False
+    except (TypeError, ValueError):
+        return False
+
+
+def _as_text(v):
+    if v is None or (isinstance(v, float) and v != v):
+        return ""
+    return str(v)
+
+
+def connect(path=LEDGER_PATH, legacy_csv=LEGACY_CSV_PATH):
+    conn = sqlite3.connect(path, timeout=10)
+    key = os.path.abspath(path)
+    if key not in _prontos:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        _migrate_csv(conn, legacy_csv)
+        _prontos.add(key)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def _migrate_csv(conn, legacy_csv):
+    if conn.execute("SELECT 1 FROM meta WHERE chave = 'migrado_csv'").fetchone():
+        return
+    rows = []
+    if legacy_csv and os.path.exists(legacy_csv):
+        with open(legacy_csv, newline="", encoding="utf-8") as f:
+            for r in csv.DictReader(f):
+                if r.get("competencia") and r.get("id"):
+                    rows.append((r["competencia"], r["id"], int(_as_bool(r.get("pago"))), _as_text(r.get("data_pagamento"))))
+    with conn:
+        # no CSV antigo a última linha de uma (competencia, id) é a que vale
+        conn.executemany(
+            "INSERT INTO pagamentos VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (competencia, id) DO UPDATE SET pago = excluded.pago, data_pagamento = excluded.data_pagamento",
+            rows,
+        )
+        conn.execute("INSERT INTO meta VALUES ('migrado_csv', ?)", (str(len(rows)),))
+        _bump_version(conn)
+
+
+def _bump_version(conn):
+    conn.execute(
+        "INSERT INTO meta VALUES ('versao', '1') "
+        "ON CONFLICT (chave) DO UPDATE SET valor = CAST(CAST(valor AS INTEGER) + 1 AS TEXT)"
+    )
+
+
+def ledger_version(path=LEDGER_PATH):
+    with closing(connect(path)) as conn:
+        row = conn.execute("SELECT valor FROM meta WHERE chave = 'versao'").fetchone()
+    return int(row[0]) if row else 0
+
+
+def read_range(competencia_de, competencia_ate, path=LEDGER_PATH):
+    # (competencia, id, pago) de um intervalo de competências, pela chave primária
+    with closing(connect(path)) as conn:
+        return conn.execute(
+            "SELECT competencia, id, pago FROM pagamentos WHERE competencia BETWEEN ? AND ? ORDER BY competencia, id",
+            (competencia_de, competencia_ate),
+        ).fetchall()
+
+
+def last_competencia(path=LEDGER_PATH):
+    with closing(connect(path)) as conn:
+        row = conn.execute("SELECT MAX(competencia) FROM pagamentos").fetchone()
+    return row[0] if row else None
+
+
+def read_competencia(competencia, path=LEDGER_PATH):
+    import pandas as pd
+    with closing(connect(path)) as conn:
+        rows = conn.execute(
+            "SELECT competencia, id, pago, data_pagamento FROM pagamentos WHERE competencia = ? ORDER BY id",
+            (competencia,),
+        ).fetchall()
+    df = pd.DataFrame(rows, columns=LEDGER_COLS)
+    df["pago"] = df["pago"].astype(bool)
+    return df
+
+
+def save_competencia(df, competencia, path=LEDGER_PATH):
+    # a competência passa a ter exatamente as linhas de df (como o concat antigo), sem tocar nas outras
+    rows = [
+        (competencia, str(r["id"]), int(_as_bool(r["pago"])), _as_text(r["data_pagamento"]))
+        for r in df[["id", "pago", "data_pagamento"]].to_dict("records")
+    ]
+    ids = [r[1] for r in rows]
+    with closing(connect(path)) as conn:
+        with conn:
+            conn.executemany(
+                "INSERT INTO pagamentos VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (competencia, id) DO UPDATE SET pago = excluded.pago, data_pagamento = excluded.data_pagamento",
+                rows,
+            )
+            conn.execute(
+                f"DELETE FROM pagamentos WHERE competencia = ? AND id NOT IN ({','.join('?' * len(ids))})",
+                [competencia] + ids,
+            )
+            _bump_version(conn)
@@ -0,0 +1,71 @@
+import numpy as np
+
+from dividas.core import add_months
+from dividas.engine import alloc_detail, debts_to_arrays, simulate_arrays, simulate_batch
+
+# ---------------- Valor marginal do aporte ----------------
+# Quanto de juros (no horizonte) R$ 1 a mais economiza conforme o destino:
+#   - cascata: +R$ 1 no aporte do mês m, distribuído pela prioridade como no plano;
+#   - direcionado: +R$ 1 pago direto na dívida j no mês m.
+# Todos os cenários perturbados viram linhas extras de simulate_batch (em blocos
+# de `chunk`), em vez de uma re-simulação completa por par (mês, dívida). Só
+# entram pares em que a dívida ainda tem saldo depois do pagamento do mês no plano.
+
+
+def _juros_total(saldo, rate_m, parcela, aportes, months, direcionado=None):
+    res = simulate_batch(saldo, rate_m, parcela, aportes, months, direcionado=direcionado)
+    return res["juros_do_mes"].sum(axis=1)
+
+
+def marginal_value(debts_df, aportes, months, delta=1.0, chunk=2000):
+    months = int(months)
+    saldo, rate_m, parcela = debts_to_arrays(debts_df)
+    aportes = np.asarray(aportes, dtype=np.float64)[:months]
+    aportes = np.pad(aportes, (0, months - aportes.size))
+    detalhe = alloc_detail(months, saldo.size)
+    base = simulate_arrays(saldo, rate_m, parcela, aportes, months, detalhe=detalhe)
+    n = base["meses"]
+    juros_base = float(base["juros_do_mes"].sum())
+
+    # cascata: cenário k = +delta no aporte do mês k+1
+    cascata = np.empty(n)
+    for a in range(0, n, chunk):
+        k = np.arange(a, min(n, a + chunk))
+        aps = np.repeat(aportes[None, :], k.size, axis=0)
+        aps[np.arange(k.size), k] += delta
+        cascata[k] = juros_base - _juros_total(saldo, rate_m, parcela, aps, months)
+
+    # direcionado: um cenário por (mês, dívida) com saldo no plano
+    mes_i, div_j = np.nonzero(detalhe["saldo"][:n] > 0.0)
+    direto = np.empty(mes_i.size)
+    for a in range(0, mes_i.size, chunk):
+        sl = slice(a, a + chunk)
+        S = mes_i[sl].size
+        dirs = (mes_i[sl] + 1, div_j[sl], np.full(S, float(delta)))
+        direto[sl] = juros_base - _juros_total(saldo, rate_m, parcela, np.broadcast_to(aportes, (S, months)), months, dirs)
+    return {
+        "mes": mes_i + 1,
+        "divida": div_j,
+        "economia_direcionada": direto / delta,
+        "economia_cascata": cascata[mes_i] / delta,
+        "juros_base": juros_base,
+        "cenarios": 1 + n + mes_i.size,
+    }
+
+
+def marginal_frame(debts_df, res, base_date, top=None):
+    # ranking: maior economia de juros por R$ direcionado primeiro
+    import pandas as pd
+    ordem = np.lexsort((res["mes"], -res["economia_direcionada"]))
+    if top is not None:
+        ordem = ordem[:top]
+    j = res["divida"][ordem]
+    return pd.DataFrame({
+        "mes": res["mes"][ordem],
+        "competencia": [add_months(base_date, int(m) - 1).strftime("%Y-%m") for m in res["mes"][ordem]],
+        "id": debts_df["id"].to_numpy()[j],
+        "nome": debts_df["nome"].to_numpy()[j],
+        "economia_por_real": np.round(res["economia_direcionada"][ordem], 4),
+        "economia_cascata": np.round(res["economia_cascata"][ordem], 4),
+        "vantagem_vs_cascata": np.round(res["economia_direcionada"][ordem] - res["economia_cascata"][ordem], 4),
+    })
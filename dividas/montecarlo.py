@@ -0,0 +1,111 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from dividas.engine import inpc_parts, rates_from_inpc, simulate_batch
+from dividas.pool import run_jobs
+
+# ---------------- Monte Carlo do INPC ----------------
+# Caminhos mensais do INPC (em % a.a., mesma unidade do `inpc_aa` da barra lateral)
+# alimentam um rate_m por mês para as dívidas "INPC + Spread". Os caminhos são
+# divididos em blocos com sementes derivadas de uma SeedSequence, então o
+# resultado só depende de (seed, chunk) e não do número de processos.
+
+INPC_MODELOS = ("passeio_aleatorio", "ar1")
+INPC_HISTORICO_PATH = "inpc_historico.csv"
+
+
+def load_inpc_history(path=INPC_HISTORICO_PATH):
+    # CSV com uma coluna `inpc_aa` (INPC acumulado 12 meses, em %), uma linha por mês.
+    # Sem arquivo -> None; arquivo ilegível ou sem dados suficientes -> ValueError com o motivo.
+    if not os.path.exists(path):
+        return None
+    try:
+        hist = pd.read_csv(path)
+    except (OSError, ValueError) as e:  # ParserError, EmptyDataError e UnicodeDecodeError são ValueError
+        raise ValueError(f"não foi possível ler {path}: {e}") from e
+    if "inpc_aa" not in hist.columns:
+        raise ValueError(f"{path} não tem a coluna `inpc_aa`")
+    serie = pd.to_numeric(hist["inpc_aa"], errors="coerce").dropna().to_numpy(dtype=np.float64)
+    if serie.size < 3:
+        raise ValueError(f"{path} precisa de pelo menos 3 valores numéricos em `inpc_aa` (tem {serie.size})")
+    return serie
+
+
+def fit_inpc_model(history, modelo="ar1"):
+    x = np.asarray(history, dtype=np.float64)
+    if modelo == "passeio_aleatorio":
+        return {"modelo": modelo, "sigma": float(np.std(np.diff(x), ddof=1)), "x0": float(x[-1])}
+    # AR(1): x_t = c + phi * x_{t-1} + e_t, por mínimos quadrados
+    X = np.column_stack([np.ones(x.size - 1), x[:-1]])
+    (c, phi), *_ = np.linalg.lstsq(X, x[1:], rcond=None)
+    resid = x[1:] - X @ np.array([c, phi])
+    phi = float(np.clip(phi, -0.999, 0.999))
+    return {"modelo": "ar1", "mu": float(c / (1.0 - phi)), "phi": phi, "sigma": float(np.std(resid, ddof=2)), "x0": float(x[-1])}
+
+
+def default_inpc_model(inpc_aa, modelo="ar1", sigma=0.3, phi=0.95):
+    params = {"modelo": modelo, "sigma": float(sigma), "x0": float(inpc_aa)}
+    if modelo == "ar1":
+        params.update(mu=float(inpc_aa), phi=float(phi))
+    return params
+
+
+def sample_inpc_paths(params, n_paths, months, rng):
+    eps = rng.standard_normal((int(n_paths), int(months))) * params["sigma"]
+    paths = np.empty_like(eps)
+    x = np.full(int(n_paths), params["x0"])
+    for t in range(int(months)):
+        if params["modelo"] == "ar1":
+            x = params["mu"] + params["phi"] * (x - params["mu"]) + eps[:, t]
+        else:
+            x = x + eps[:, t]
+        paths[:, t] = x
+    # a2m não aceita taxa <= -100%; deflação forte continua possível
+    return np.maximum(paths, -99.0)
+
+
+def _run_chunk(args):
+    seed_seq, n_paths, params, saldo, rate_m, indexada, spread_aa, parcela, aportes, months = args
+    rng = np.random.default_rng(seed_seq)
+    paths = sample_inpc_paths(params, n_paths, months, rng)
+    rates = rates_from_inpc(rate_m, indexada, spread_aa, paths)  # (k, T, N)
+    res = simulate_batch(saldo, rates, parcela, np.broadcast_to(aportes, (n_paths, aportes.size)), months)
+    return res["payoff_mes"], res["juros_divida"], res["meses"]
+
+
+def monte_carlo(debts_df, aportes, months, params, n_paths=10000, seed=0, chunk=1000, workers=None):
+    # debts_df preparado com inpc_aa=0 (ver inpc_parts); aportes: array (T,) como em aportes_to_array
+    rate_m, indexada, spread_aa = inpc_parts(debts_df)
+    saldo = debts_df["saldo"].to_numpy(dtype=np.float64)
+    parcela = debts_df["parcela"].to_numpy(dtype=np.float64)
+    aportes = np.asarray(aportes, dtype=np.float64)
+    sizes = [min(chunk, n_paths - i) for i in range(0, int(n_paths), int(chunk))]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(ss, k, params, saldo, rate_m, indexada, spread_aa, parcela, aportes, int(months)) for ss, k in zip(seeds, sizes)]
+    parts = run_jobs(_run_chunk, jobs, workers)
+
+    return {
+        "payoff_mes": np.concatenate([p[0] for p in parts]),
+        "juros_divida": np.concatenate([p[1] for p in parts]),
+        "meses": np.concatenate([p[2] for p in parts]),
+    }
+
+
+def summarize_monte_carlo(debts_df, res, base_date, percentis=(10, 50, 90)):
+    def _data(m):
+        if not np.isfinite(m):
+            return "não quita"
+        return (pd.Timestamp(base_date) + pd.DateOffset(months=int(m) - 1)).date().isoformat()
+
+    payoff = np.where(res["payoff_mes"] > 0, res["payoff_mes"], np.inf).astype(np.float64)
+    out = {"id": debts_df["id"].to_numpy(), "nome": debts_df["nome"].to_numpy()}
+    pm = np.percentile(payoff, percentis, axis=0, method="inverted_cdf")
+    pj = np.percentile(res["juros_divida"], percentis, axis=0)
+    for k, p in enumerate(percentis):
+        out[f"quitacao_P{p}"] = [_data(m) for m in pm[k]]
+    for k, p in enumerate(percentis):
+        out[f"juros_P{p}"] = np.round(pj[k], 2)
+    out["prob_quitar"] = np.round(np.isfinite(payoff).mean(axis=0), 3)
+    return pd.DataFrame(out)
@@ -0,0 +1,155 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from dividas.engine import debts_to_arrays, simulate_batch
+from dividas.pool import make_executor, resolve_workers, run_jobs
+
+# ---------------- Ordem ótima de quitação ----------------
+# Cada candidato é uma permutação das dívidas (índices na ordem de pagamento) e
+# vira uma linha de simulate_batch. A busca exata é um branch-and-bound em
+# largura sobre prefixos: enquanto alguma dívida do prefixo está ativa ela
+# absorve todo o aporte, então os juros até o mês T_k em que o prefixo inteiro
+# é quitado não dependem da ordem do resto. Esses juros são um limite inferior
+# válido para qualquer completamento; no objetivo "meses" o limite dos meses vem
+# de _months_lower_bound (o saldo restante em T_k contra o caixa máximo por mês).
+
+OBJETIVOS = ("juros", "meses")
+_PESO_MES = 1e12  # objetivo "meses": ordena por meses e desempata por juros
+
+
+def _months_lower_bound(saldo_ini, saldo_total, t_k, rate_min, caixa, months):
+    # Meses até quitar tudo, por baixo, a partir do mês t_k: o saldo total no fim do mês
+    # t_k - 1 não depende da ordem do resto (o prefixo absorve todo o aporte até t_k).
+    # Cada mês ele rende pelo menos rate_min e cai no máximo `caixa` (todas as parcelas
+    # + aporte: parcela de dívida ativa + snowball das quitadas <= soma das parcelas).
+    K = t_k.size
+    idx = np.maximum(t_k - 2, 0)
+    L = np.where(t_k > 1, saldo_total[np.arange(K), idx] if saldo_total.shape[1] else saldo_ini, saldo_ini)
+    t_lb = np.full(K, months, dtype=np.int64)
+    aberto = np.ones(K, dtype=bool)
+    for t in range(max(1, int(t_k.min())), months + 1):
+        passo = aberto & (t >= t_k)
+        L = np.where(passo, L * (1.0 + rate_min) - caixa[t - 1], L)
+        fim = passo & (L <= 0.01)
+        t_lb[fim] = t
+        aberto &= ~fim
+        if not aberto.any():
+            break
+    return t_lb
+
+
+def _score_orders(args):
+    orders, k, saldo, rate_m, parcela, aportes, months = args
+    K = orders.shape[0]
+    res = simulate_batch(saldo[orders], rate_m[orders], parcela[orders], np.broadcast_to(aportes, (K, aportes.size)), months)
+    meses = res["meses"]
+    cum = np.cumsum(res["juros_do_mes"], axis=1)
+    juros_total = cum[:, -1] if cum.shape[1] else np.zeros(K)
+    quitou = res["saldo_final"].sum(axis=1) <= 0.01
+    if k:
+        pm = res["payoff_mes"][:, :k]
+        prefixo_quitado = (pm > 0).all(axis=1)
+        t_k = np.where(prefixo_quitado, pm.max(axis=1), meses)
+        lb_juros = cum[np.arange(K), np.maximum(t_k, 1) - 1] if cum.shape[1] else np.zeros(K)
+        caixa = parcela.sum() + np.pad(aportes[:months], (0, max(0, months - aportes.size)))
+        t_lb = _months_lower_bound(saldo.sum(), res["saldo_total"], t_k, max(0.0, float(rate_m.min())), caixa, months)
+        # prefixo que não quita no horizonte: toda a simulação vai até `meses`
+        lb_meses = np.where(prefixo_quitado, np.maximum(t_k, t_lb), meses)
+    else:
+        lb_meses = np.zeros(K, dtype=np.int64)
+        lb_juros = np.zeros(K)
+    return juros_total, meses, quitou, lb_juros, lb_meses
+
+
+def _scores(parts, objetivo):
+    juros, meses, quitou, lb_juros, lb_meses = (np.concatenate([p[i] for p in parts]) for i in range(5))
+    if objetivo == "meses":
+        return juros, meses, quitou, meses * _PESO_MES + juros, lb_meses * _PESO_MES + lb_juros
+    return juros, meses, quitou, juros, lb_juros
+
+
+def _complete(prefixes, N):
+    # prefixo + dívidas restantes na ordem atual
+    F, k = prefixes.shape
+    chave = np.tile(np.arange(N, 2 * N), (F, 1))
+    np.put_along_axis(chave, prefixes, np.arange(k)[None, :].repeat(F, axis=0), axis=1)
+    return np.argsort(chave, axis=1, kind="stable")
+
+
+def _children(prefixes, N):
+    F, k = prefixes.shape
+    usado = np.zeros((F, N), dtype=bool)
+    np.put_along_axis(usado, prefixes, True, axis=1)
+    pai, prox = np.nonzero(~usado)
+    return np.column_stack([prefixes[pai], prox])
+
+
+def optimize_order(debts_df, aportes, months, objetivo="juros", workers=None, chunk=2000, max_exato=10):
+    # debts_df preparado (ordem atual = ordem das linhas); aportes: array (T,)
+    saldo, rate_m, parcela = debts_to_arrays(debts_df)
+    aportes = np.asarray(aportes, dtype=np.float64)
+    N = saldo.size
+    months = int(months)
+
+    def avaliar(orders, k, executor=None):
+        jobs = [(orders[i:i + chunk], k, saldo, rate_m, parcela, aportes, months) for i in range(0, len(orders), chunk)]
+        return _scores(run_jobs(_score_orders, jobs, workers=1, executor=executor), objetivo)
+
+    nomes = ["Atual", "Avalanche (maior taxa)", "Snowball (menor saldo)"]
+    base = np.stack([
+        np.arange(N),
+        np.argsort(-rate_m, kind="stable"),
+        np.argsort(saldo, kind="stable"),
+    ])
+    juros_b, meses_b, quitou_b, score_b, _ = avaliar(base, 0)
+    i_best = int(np.argmin(score_b))
+    best_order, best_score = base[i_best], score_b[i_best]
+    avaliados = len(base)
+
+    exato = N <= max_exato
+    if exato and N > 1:
+        n_workers = resolve_workers(workers, math.factorial(N) // chunk + 1)
+        executor = make_executor(n_workers) if n_workers > 1 else None
+        try:
+            frontier = np.zeros((1, 0), dtype=np.int64)
+            for k in range(1, N):
+                filhos = _children(frontier, N)
+                if not len(filhos):
+                    break
+                orders = _complete(filhos, N)
+                _, _, _, score, lb = avaliar(orders, k, executor)
+                avaliados += len(orders)
+                j = int(np.argmin(score))
+                if score[j] < best_score:
+                    best_order, best_score = orders[j], score[j]
+                # folga de meio centavo para não podar empates por arredondamento
+                frontier = filhos[lb < best_score - 0.005]
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    juros_o, meses_o, quitou_o, _, _ = avaliar(best_order[None, :], 0)
+    estrategias = pd.DataFrame({
+        "estrategia": nomes + ["Ótima" if exato else "Melhor heurística"],
+        "juros_total": np.round(np.append(juros_b, juros_o), 2),
+        "meses": np.append(meses_b, meses_o),
+        "quitou": np.append(quitou_b, quitou_o),
+    })
+    prioridade_otima = np.empty(N, dtype=np.int64)
+    prioridade_otima[best_order] = np.arange(1, N + 1)
+    prioridades = pd.DataFrame({
+        "id": debts_df["id"].to_numpy(),
+        "nome": debts_df["nome"].to_numpy(),
+        "prioridade_atual": debts_df["prioridade"].to_numpy(),
+        "prioridade_sugerida": prioridade_otima,
+    }).sort_values("prioridade_sugerida").reset_index(drop=True)
+    return {
+        "estrategias": estrategias,
+        "prioridades": prioridades,
+        "economia_juros": float(juros_b[0] - juros_o[0]),
+        "economia_meses": int(meses_b[0] - meses_o[0]),
+        "avaliados": avaliados,
+        "exato": exato,
+    }
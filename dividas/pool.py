@@ -0,0 +1,46 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing as mp
+
+# ---------------- Pool de processos ----------------
+# spawn: os filhos não herdam o estado do processo do Streamlit (threads, sessão).
+# Com um único worker tudo roda no próprio processo, sem custo de inicialização.
+
+
+def make_executor(workers):
+    return ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"))
+
+
+def resolve_workers(workers, n_jobs):
+    return max(1, min(int(n_jobs), workers or os.cpu_count() or 1))
+
+
+def run_jobs(fn, jobs, workers=None, executor=None):
+    if executor is not None:
+        return list(executor.map(fn, jobs))
+    workers = resolve_workers(workers, len(jobs))
+    if workers <= 1:
+        return [fn(j) for j in jobs]
+    with make_executor(workers) as ex:
+        return list(ex.map(fn, jobs))
+
+
+def imap_bounded(fn, jobs, workers=None, pendentes=None):
+    # Como run_jobs, mas `jobs` pode ser um iterador (lido sob demanda) e no máximo
+    # `pendentes` jobs ficam em voo; os resultados saem na ordem dos jobs.
+    workers = max(1, workers or os.cpu_count() or 1)
+    if workers <= 1:
+        for j in jobs:
+            yield fn(j)
+        return
+    pendentes = max(1, pendentes or 2 * workers)
+    jobs = iter(jobs)
+    with make_executor(workers) as ex:
+        fila = deque()
+        for j in jobs:
+            fila.append(ex.submit(fn, j))
+            if len(fila) >= pendentes:
+                yield fila.popleft().result()
+        while fila:
+            yield fila.popleft().result()
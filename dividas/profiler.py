@@ -0,0 +1,83 @@
+import cProfile
+import functools
+import io
+import json
+import pstats
+import time
+from datetime import datetime
+
+# ---------------- Medição de desempenho por execução ----------------
+# Um RerunProfiler por rerun do Streamlit: `marca(nome)` fecha a seção anterior
+# e abre a próxima (o script é linear, então basta uma marca por seção), e
+# `instrument(nome, fn)` acumula tempo e número de chamadas dos caminhos quentes
+# (prepare_debts, simulate, exportação). Opcionalmente roda o rerun inteiro sob
+# cProfile. `finish()` devolve o registro e, com `log_path`, anexa uma linha JSON.
+# st.rerun(), st.stop() e a interrupção por uma nova interação encerram o script
+# por exceção antes do fim: o app guarda o profiler ativo em st.session_state e o
+# próximo rerun chama finish(interrompida=True) nele antes de abrir o seu.
+
+PERFIL_LOG = "desempenho.jsonl"
+PERFIL_TOP = 25
+
+
+class RerunProfiler:
+    def __init__(self, cprofile=False):
+        self.secoes = {}
+        self.chamadas = {}
+        self._aberta = None
+        self._t_secao = None
+        self._t0 = time.perf_counter()
+        self._prof = None
+        self.registro = None
+        if cprofile:
+            self._prof = cProfile.Profile()
+            try:
+                self._prof.enable()
+            except ValueError:  # outro profiler já ativo nesta thread
+                self._prof = None
+
+    def marca(self, nome):
+        agora = time.perf_counter()
+        if self._aberta is not None:
+            self.secoes[self._aberta] = self.secoes.get(self._aberta, 0.0) + agora - self._t_secao
+        self._aberta, self._t_secao = nome, agora
+
+    def instrument(self, nome, fn):
+        @functools.wraps(fn)
+        def medido(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                n, total = self.chamadas.get(nome, (0, 0.0))
+                self.chamadas[nome] = (n + 1, total + time.perf_counter() - t0)
+        return medido
+
+    def finish(self, log_path=None, interrompida=False):
+        if self.registro is not None:  # já encerrado
+            return self.registro
+        self.marca(None)
+        total = time.perf_counter() - self._t0
+        registro = {
+            "quando": datetime.now().isoformat(timespec="seconds"),
+            "total_ms": round(total * 1000.0, 2),
+            "secoes": {k: round(v * 1000.0, 2) for k, v in self.secoes.items()},
+            "chamadas": {k: {"n": n, "ms": round(t * 1000.0, 2)} for k, (n, t) in self.chamadas.items()},
+        }
+        if interrompida:
+            registro["interrompida"] = True
+        if self._prof is not None:
+            self._prof.disable()
+            registro["cprofile"] = profile_text(self._prof)
+            self._prof = None
+        if log_path:
+            with open(log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        self.registro = registro
+        return registro
+
+
+def profile_text(prof, top=PERFIL_TOP):
+    out = io.StringIO()
+    pstats.Stats(prof, stream=out).sort_stats("cumulative").print_stats(top)
+    return out.getvalue()
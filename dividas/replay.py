@@ -0,0 +1,109 @@
+import numpy as np
+
+from dividas.core import add_months
+from dividas.engine import debts_to_arrays, simulate_arrays
+from dividas.ledger import LEDGER_PATH, last_competencia, read_range
+
+# ---------------- Plano × realizado (replay do livro de pagamentos) ----------------
+# O livro de pagamentos vira uma matriz competência × dívida (pagou a parcela?) e
+# o histórico inteiro é reproduzido numa passada de simulate_arrays com `pagou`:
+# parcela não paga não abate o saldo e a dívida acumula os juros do mês. O saldo
+# real ao fim da última competência registrada é o ponto de partida da
+# reprojeção até o horizonte, retomada com o snowball e as quitações do replay.
+# Competência k (1 = mês de base_date) = mês k da simulação. Só competências com
+# alguma linha no livro contam como realizadas; meses sem registro seguem o plano
+# (todas as parcelas pagas), senão salvar só o checklist do mês atual faria todo o
+# intervalo desde base_date parecer inadimplente.
+
+
+def competencias(base_date, n):
+    return [add_months(base_date, k).strftime("%Y-%m") for k in range(int(n))]
+
+
+def months_until(base_date, competencia):
+    y, m = map(int, competencia.split("-"))
+    return (y - base_date.year) * 12 + m - base_date.month + 1
+
+
+def ledger_matrix(rows, comps, ids):
+    # rows: (competencia, id, pago). Devolve (pagou, registrada): numa competência
+    # registrada, linha ausente = parcela não paga; competência sem nenhuma linha = plano
+    pagou = np.zeros((len(comps), len(ids)), dtype=bool)
+    registrada = np.zeros(len(comps), dtype=bool)
+    if rows:
+        pos_c = {c: i for i, c in enumerate(comps)}
+        pos_i = {str(d): j for j, d in enumerate(ids)}
+        ri = np.fromiter((pos_c.get(r[0], -1) for r in rows), dtype=np.int64, count=len(rows))
+        ci = np.fromiter((pos_i.get(str(r[1]), -1) for r in rows), dtype=np.int64, count=len(rows))
+        registrada[ri[ri >= 0]] = True
+        ok = (ri >= 0) & (ci >= 0)
+        pagou[ri[ok], ci[ok]] = np.fromiter((bool(r[2]) for r in rows), dtype=bool, count=len(rows))[ok]
+    pagou[~registrada] = True
+    return pagou, registrada
+
+
+def replay(debts_df, aportes, months, base_date, ate=None, aportes_feitos=True, path=LEDGER_PATH):
+    # debts_df preparado; aportes (T,) do plano. `ate`: última competência realizada
+    # (padrão: a última do livro). aportes_feitos=False reproduz só as parcelas nas
+    # competências registradas.
+    months = int(months)
+    saldo0, rate_m, parcela = debts_to_arrays(debts_df)
+    aportes = np.pad(np.asarray(aportes, dtype=np.float64)[:months], (0, max(0, months - len(aportes))))
+    ids = debts_df["id"].to_numpy()
+    ate = ate or last_competencia(path)
+    K = min(max(0, months_until(base_date, ate)), months) if ate else 0
+    comps = competencias(base_date, K)
+    if K:
+        pagou, registrada = ledger_matrix(read_range(comps[0], comps[-1], path), comps, ids)
+    else:
+        pagou, registrada = np.zeros((0, ids.size), dtype=bool), np.zeros(0, dtype=bool)
+
+    plano = simulate_arrays(saldo0, rate_m, parcela, aportes, months)
+    plano_k = simulate_arrays(saldo0, rate_m, parcela, aportes[:K], K)
+    # aportes_feitos=False zera o aporte só nas competências registradas; as demais seguem o plano
+    aportes_real = aportes[:K] if aportes_feitos else np.where(registrada, 0.0, aportes[:K])
+    real = simulate_arrays(saldo0, rate_m, parcela, aportes_real, K, pagou=pagou)
+    feitos = real["meses"]
+    snowball = float(real["snowball_para_prox"][feitos - 1]) if feitos else 0.0
+    quitadas = np.where(real["payoff_mes"] > 0, real["payoff_mes"], 0)
+    proj = simulate_arrays(real["saldo_final"], rate_m, parcela, aportes[K:], months - K, snowball0=snowball, payoff0=quitadas)
+    payoff_proj = np.where(quitadas > 0, quitadas, np.where(proj["payoff_mes"] > 0, proj["payoff_mes"] + K, 0))
+
+    # parcela em aberto = mês em que a dívida ainda tinha saldo no plano e não consta paga
+    ativa = np.ones((K, ids.size), dtype=bool)
+    if K:
+        pm = plano["payoff_mes"]
+        ativa = (np.arange(1, K + 1)[:, None] <= np.where(pm > 0, pm, months)[None, :])
+    return {
+        "meses_realizados": K,
+        "competencias": comps,
+        "pagou": pagou,
+        "registradas": int(registrada.sum()),
+        "parcelas_perdidas": (ativa & ~pagou).sum(axis=0),
+        "saldo_plano": plano_k["saldo_final"],
+        "saldo_real": real["saldo_final"],
+        "payoff_plano": plano["payoff_mes"],
+        "payoff_reprojetado": payoff_proj,
+        "juros_plano": float(plano["juros_do_mes"].sum()),
+        "juros_reprojetado": float(real["juros_do_mes"].sum() + proj["juros_do_mes"].sum()),
+        "saldo_total_plano": plano["saldo_total"],
+        "saldo_total_real": np.concatenate([real["saldo_total"], np.full(K - feitos, real["saldo_total"][-1] if feitos else 0.0), proj["saldo_total"]]),
+    }
+
+
+def drift_frame(debts_df, res, base_date):
+    import pandas as pd
+
+    def data(m):
+        return add_months(base_date, int(m) - 1).isoformat() if m > 0 else None
+
+    return pd.DataFrame({
+        "id": debts_df["id"].to_numpy(),
+        "nome": debts_df["nome"].to_numpy(),
+        "parcelas_em_aberto": res["parcelas_perdidas"],
+        "saldo_plano": np.round(res["saldo_plano"], 2),
+        "saldo_real": np.round(res["saldo_real"], 2),
+        "diferenca": np.round(res["saldo_real"] - res["saldo_plano"], 2),
+        "quitacao_plano": [data(m) for m in res["payoff_plano"]],
+        "quitacao_reprojetada": [data(m) for m in res["payoff_reprojetado"]],
+    })
@@ -1,45 +1,50 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from datetime import datetime, date
+from datetime import date
 import os
+import shutil
+import uuid
 import matplotlib.pyplot as plt
 
-st.set_page_config(page_title="Plano de Quitação de Dívidas", layout="wide")
+from dividas.core import (
+    DEFAULT_INPC_2025, BASE_DAY, BASE_START, compute_competencia, load_csv_if_exists,
+    save_csv, prepare_debts, run_and_summarize, add_months, read_typed_csv, CSV_SCHEMAS,
+)
+from dividas.engine import (
+    simulate_vectorized, scenario_grid, aportes_to_array, alloc_detail, detail_frame, DETALHE_CAMPOS,
+)
+from dividas.cache import CACHE_DIR, simulation_cache, simulation_key
+from dividas.events import simulate_event_driven
+from dividas.export import FORMATOS, MIME, export_bytes
+from dividas.goalseek import solve_aporte, solve_inpc
+from dividas.incremental import IncrementalSimulator, simulate_incremental
+from dividas.ledger import last_competencia, ledger_version, read_competencia, save_competencia
+from dividas.marginal import marginal_frame, marginal_value
+from dividas.optimize import OBJETIVOS, optimize_order
+from dividas.profiler import PERFIL_LOG, RerunProfiler
+from dividas.replay import drift_frame, replay
+from dividas.montecarlo import (
+    INPC_MODELOS, INPC_HISTORICO_PATH, load_inpc_history, fit_inpc_model,
+    default_inpc_model, monte_carlo, summarize_monte_carlo,
+)
 
-# ---------------- Helpers ----------------
-def a2m(rate_annual):
-    if rate_annual is None or pd.isna(rate_annual):
-        return 0.0
-    return (1 + float(rate_annual)/100.0)**(1/12) - 1
+st.set_page_config(page_title="Plano de Quitação de Dívidas", layout="wide")
 
-def load_csv_if_exists(path, dtype=None, parse_dates=None):
-    if os.path.exists(path):
-        try:
-            return pd.read_csv(path, dtype=dtype, parse_dates=parse_dates)
-        except Exception:
-            return None
-    return None
-
-def save_csv(df, path):
-    df.to_csv(path, index=False)
-
-def compute_competencia(today: date, base_day: int = 20) -> str:
-    y = today.year
-    m = today.month
-    if today.day < base_day:
-        if m == 1:
-            y -= 1
-            m = 12
-        else:
-            m -= 1
-    return f"{y:04d}-{m:02d}"
+# ---------------- Desempenho (medição deste rerun) ----------------
+# tempos por seção e dos caminhos quentes; o painel "Desempenho" da barra lateral mostra o resultado
+perf_log_path = PERFIL_LOG if st.session_state.get("perf_log", True) else None
+# rerun anterior que não chegou ao fim (st.rerun/st.stop/interrupção): fecha o cProfile dele e grava a linha
+perf_anterior = st.session_state.pop("perf_ativo", None)
+if perf_anterior is not None:
+    perf_anterior.finish(perf_log_path, interrompida=True)
+perf = RerunProfiler(cprofile=st.session_state.get("perf_cprofile", False))
+st.session_state["perf_ativo"] = perf
+perf.marca("Início")
+prepare_debts = perf.instrument("prepare_debts", prepare_debts)
+export_bytes = perf.instrument("exportação", export_bytes)
 
 # ---------------- Defaults ----------------
-DEFAULT_INPC_2025 = 4.7
-BASE_DAY = 20
-BASE_START = datetime(2025, 9, BASE_DAY)
-
 default_debts = pd.DataFrame([
     {"id":"CX-6481-47","nome":"Consignado Caixa — 03.3395.110.0006481-47","tipo":"Consignado PRICE","saldo_atual":12368.49,"parcela":234.63,"juros_aa":12.55,"indexador":"","spread_aa":0.0,"prioridade":2},
     {"id":"CX-6621-31","nome":"Consignado Caixa — 03.3395.110.0006621-31","tipo":"Consignado PRICE","saldo_atual":12885.31,"parcela":233.96,"juros_aa":12.55,"indexador":"","spread_aa":0.0,"prioridade":3},
@@ -52,8 +57,14 @@ default_debts = pd.DataFrame([
 ])
 
 # ---------------- State & Sidebar ----------------
+perf.marca("Barra lateral")
 if "dividas_df" not in st.session_state:
-    saved = load_csv_if_exists("dividas.csv")
+    try:
+        saved = load_csv_if_exists("dividas.csv", raise_errors=True)
+    except Exception as e:
+        # segue com as dívidas padrão, mas avisa: "Salvar dívidas" substituiria o arquivo
+        saved = None
+        st.session_state.setdefault("erros_csv", {})["dividas.csv"] = e
     st.session_state["dividas_df"] = saved if isinstance(saved, pd.DataFrame) else default_debts.copy()
 
 dividas_df = st.session_state["dividas_df"].copy()
@@ -61,6 +72,23 @@ dividas_df = st.session_state["dividas_df"].copy()
 st.sidebar.header("Configurações")
 inpc_aa = st.sidebar.number_input("INPC anual (%)", min_value=0.0, max_value=25.0, value=DEFAULT_INPC_2025, step=0.1)
 horizonte_meses = st.sidebar.slider("Horizonte (meses)", min_value=12, max_value=180, value=120, step=12)
+motor = st.sidebar.radio("Motor de simulação", ["Mês a mês (arrays)", "Por eventos (forma fechada)"], help="O motor por eventos salta direto entre as quitações; os resultados são os mesmos.")
+
+st.sidebar.write("—")
+st.sidebar.subheader("Cache de simulações")
+cache_disco = st.sidebar.checkbox("Guardar também em disco", value=False, help=f"Pasta {CACHE_DIR}/ ao lado de simulacao_dividas.xlsx; sobrevive a reinícios do app.")
+# o cache é do processo; a pasta vai em cada chamada para a escolha valer só nesta sessão
+cache_pasta = os.path.join(os.path.dirname(os.path.abspath("simulacao_dividas.xlsx")), CACHE_DIR)
+cache_dir = cache_pasta if cache_disco else None
+cache_stats_box = st.sidebar.empty()
+if st.sidebar.button("Limpar cache"):
+    simulation_cache.clear(disk_dir=cache_pasta)
+
+st.sidebar.write("—")
+perf_box = st.sidebar.expander("Desempenho")
+with perf_box:
+    st.checkbox("Capturar cProfile", value=False, key="perf_cprofile", help="Roda as próximas execuções sob cProfile e mostra as funções mais caras aqui.")
+    st.checkbox(f"Gravar log em {PERFIL_LOG}", value=True, key="perf_log", help="Uma linha JSON por execução, com o tempo de cada seção.")
 
 st.sidebar.write("—")
 st.sidebar.subheader("Salvar/Carregar Dados")
@@ -69,6 +97,7 @@ if st.sidebar.button("Salvar dívidas"):
         # salva o que está na UI (editado), não o snapshot antigo
         save_csv(st.session_state.get("dividas_edit", dividas_df), "dividas.csv")
         st.session_state["dividas_df"] = st.session_state.get("dividas_edit", dividas_df).copy()
+        st.session_state.get("erros_csv", {}).pop("dividas.csv", None)
         st.sidebar.success("Dívidas salvas em dividas.csv")
     except Exception as e:
         st.sidebar.error(f"Erro ao salvar dívidas: {e}")
@@ -76,17 +105,19 @@ if st.sidebar.button("Salvar dívidas"):
 uploaded = st.sidebar.file_uploader("Carregar dívidas (CSV)", type=["csv"])
 if uploaded is not None:
     try:
-        new_df = pd.read_csv(uploaded)
+        new_df = read_typed_csv(uploaded, CSV_SCHEMAS["dividas.csv"])
         st.session_state["dividas_df"] = new_df
         dividas_df = new_df.copy()
         st.sidebar.success("Dívidas carregadas.")
     except Exception as e:
         st.sidebar.error(f"Erro ao carregar CSV: {e}")
+erros_csv_box = st.sidebar.container()
 
 st.title("🔁 Simulador de Quitação de Dívidas (Avalanche do Orçamento)")
 st.caption("Edite os valores, defina aportes variáveis e acompanhe o checklist mensal. Base: dia 20 de cada mês.")
 
 # ---------------- 1) Editor de Dívidas ----------------
+perf.marca("1) Dívidas")
 st.markdown("### 1) Edite suas dívidas (valores atuais)")
 dividas_edit = st.data_editor(
     dividas_df,
@@ -104,9 +135,14 @@ dividas_edit = st.data_editor(
 st.session_state["dividas_edit"] = dividas_edit.copy()
 
 # ---------------- 2) Aportes mensais ----------------
+perf.marca("2) Aportes")
 st.markdown("### 2) Aportes mensais (editáveis e salváveis)")
 if "aportes_df" not in st.session_state:
-    ap_saved = load_csv_if_exists("aportes.csv")
+    try:
+        ap_saved = load_csv_if_exists("aportes.csv", raise_errors=True)
+    except Exception as e:
+        ap_saved = None
+        st.session_state.setdefault("erros_csv", {})["aportes.csv"] = e
     if isinstance(ap_saved, pd.DataFrame) and "mes" in ap_saved.columns and "aporte" in ap_saved.columns:
         st.session_state["aportes_df"] = ap_saved
     else:
@@ -135,105 +171,97 @@ with c2:
 with c3:
     if st.button("Salvar aportes"):
         try:
-            save_csv(aportes_df, "aportes.csv")
-            st.session_state["aportes_df"] = aportes_df.copy()
+            # salva o que está na UI (editado), como em "Salvar dívidas"
+            aportes_salvar = st.session_state.get("aportes_edit", aportes_df)
+            save_csv(aportes_salvar, "aportes.csv")
+            st.session_state["aportes_df"] = aportes_salvar.copy()
+            st.session_state.get("erros_csv", {}).pop("aportes.csv", None)
             st.success("Aportes salvos em aportes.csv")
         except Exception as e:
             st.error(f"Erro ao salvar aportes: {e}")
+for nome_csv, e in st.session_state.get("erros_csv", {}).items():
+    erros_csv_box.error(f"Não foi possível ler {nome_csv} ({e}); usando os valores padrão. Salvar substituirá o arquivo.")
+
+aportes_edit = st.data_editor(
+    aportes_df,
+    num_rows="dynamic",
+    use_container_width=True,
+    hide_index=True,
+    column_config={
+        "mes": st.column_config.NumberColumn("mês", step=1),
+        "aporte": st.column_config.NumberColumn("aporte (R$)", format="%.2f"),
+    },
+)
+st.session_state["aportes_edit"] = aportes_edit.copy()
 
 # ---------------- 3) Simulação principal ----------------
+perf.marca("3) Simulação")
 st.markdown("### 3) Rodar simulação")
 st.write("Método **Avalanche do Orçamento**: quita primeiro pela **prioridade**, realocando as parcelas liberadas para acelerar as próximas.")
 
-def prepare_debts(df, inpc_aa):
-    rows = []
-    for _, r in df.iterrows():
-        if r["tipo"] == "INPC + Spread":
-            annual_rate = (inpc_aa or 0.0) + float(r.get("spread_aa", 0.0) or 0.0)
-        else:
-            annual_rate = float(r.get("juros_aa") or 0.0)
-        rows.append({
-            "id": r["id"],
-            "nome": r["nome"],
-            "tipo": r["tipo"],
-            "saldo": float(r["saldo_atual"] or 0.0),
-            "parcela": float(r["parcela"] or 0.0),
-            "rate_m": a2m(annual_rate),
-            "prioridade": int(r["prioridade"] or 999),
-        })
-    debts = pd.DataFrame(rows)
-    debts = debts.sort_values(by=["prioridade", "saldo"]).reset_index(drop=True)
-    return debts
-
-def simulate(debts_df, aportes_df, months, base_date):
-    debts = debts_df.copy()
-    aportes = aportes_df.set_index("mes")["aporte"].to_dict()
-    records = []
-    payoff = {row["id"]: pd.NaT for _, row in debts.iterrows()}  # Initialize with NaT (Not a Timestamp)
-    snowball_extra = 0.0
-    for m in range(1, months+1):
-        date = pd.Timestamp(base_date) + pd.DateOffset(months=m-1)
-        min_pay_total = 0.0
-        interest_this_month = 0.0
-
-        for idx in debts.index:
-            if debts.at[idx, "saldo"] <= 0.0:
-                continue
-            saldo0 = debts.at[idx, "saldo"]
-            rate_m = debts.at[idx, "rate_m"]
-            parcela = debts.at[idx, "parcela"]
-            saldo1 = saldo0 * (1.0 + rate_m)
-            interest_this_month += saldo0 * rate_m
-            pago = min(parcela, saldo1)
-            saldo2 = max(0.0, saldo1 - pago)
-            min_pay_total += pago
-            debts.at[idx, "saldo"] = saldo2
-
-        aporte = float(aportes.get(m, 0.0) or 0.0) + snowball_extra
-        extra_used = 0.0
-        for idx in debts.index:
-            if aporte <= 0.0:
-                break
-            if debts.at[idx, "saldo"] <= 0.0:
-                continue
-            saldo = debts.at[idx, "saldo"]
-            pago = min(aporte, saldo)
-            saldo -= pago
-            aporte -= pago
-            extra_used += pago
-            debts.at[idx, "saldo"] = saldo
-
-        newly_freed = 0.0
-        for idx in debts.index:
-            if debts.at[idx, "saldo"] <= 0.0 and payoff[debts.at[idx, "id"]] is None:
-                payoff[debts.at[idx, "id"]] = pd.Timestamp(date)  # Ensure it's explicitly a Timestamp
-                newly_freed += debts.at[idx, "parcela"]
-
-        snowball_extra += newly_freed
-
-        records.append({
-            "mes": m,
-            "data_ref": date.date().isoformat(),
-            "pago_minimo": round(min_pay_total, 2),
-            "aporte_extra_usado": round(extra_used, 2),
-            "snowball_para_prox": round(snowball_extra, 2),
-            "juros_do_mes": round(interest_this_month, 2),
-            "saldo_total": round(debts["saldo"].sum(), 2),
-        })
-
-        if debts["saldo"].sum() <= 0.01:
-            break
-
-    timeline = pd.DataFrame(records)
-    payoff_df = pd.DataFrame([
-        {"id": d["id"], "nome": d["nome"], "quitado_em": payoff[d["id"]].date().isoformat() if isinstance(payoff[d["id"]], pd.Timestamp) and not pd.isna(payoff[d["id"]]) else None}
-        for _, d in debts_df.iterrows()
-    ])
-    return timeline, payoff_df, debts
-
+def export_controls(key, nome_base):
+    # o arquivo só é montado quando pedido, então rodar a simulação não paga a geração da planilha
+    if key not in st.session_state:
+        return
+    cole1, cole2 = st.columns([1,2])
+    with cole1:
+        formato = st.radio("Formato do download", FORMATOS, horizontal=True, key=f"{key}_formato",
+                           format_func=lambda f: {"xlsx": "Excel (XLSX)", "parquet": "Parquet (.zip)"}[f])
+    with cole2:
+        if st.button("Preparar arquivo para download", key=f"{key}_preparar"):
+            st.session_state[f"{key}_arquivo"] = (formato, export_bytes(st.session_state[key], formato))
+        arquivo = st.session_state.get(f"{key}_arquivo")
+        if arquivo is not None and arquivo[0] == formato:
+            nome = f"{nome_base}.xlsx" if formato == "xlsx" else f"{nome_base}_parquet.zip"
+            st.download_button(f"Baixar {nome}", data=arquivo[1], file_name=nome, mime=MIME[formato], on_click="ignore", key=f"{key}_baixar")
+
+def simulate(debts_df, aportes_df, months, base_date, incremental=None):
+    # motor em arrays NumPy (dividas/engine.py) ou por eventos (dividas/events.py); mesmas saídas,
+    # por isso o motor não entra na chave do cache. Com `incremental`, o motor em arrays retoma
+    # do primeiro mês alterado desde a última chamada (dividas/incremental.py).
+    chave = simulation_key(debts_df, aportes_to_array(aportes_df, months), months, base_date)
+    if motor.startswith("Por eventos"):
+        return simulation_cache.get_or_compute(chave, lambda: simulate_event_driven(debts_df, aportes_df, months, base_date), disk_dir=cache_dir)
+    if incremental is not None:
+        return simulation_cache.get_or_compute(chave, lambda: simulate_incremental(incremental, debts_df, aportes_df, months, base_date), disk_dir=cache_dir)
+    return simulation_cache.get_or_compute(chave, lambda: simulate_vectorized(debts_df, aportes_df, months, base_date), disk_dir=cache_dir)
+
+simulate = perf.instrument("simulate", simulate)
+
+detalhar = st.checkbox("Detalhar por dívida (saldo, juros, mínimo e aporte de cada dívida em cada mês)", value=False)
+marginal = st.checkbox("Calcular o valor marginal do aporte (onde R$ 1 a mais economiza mais juros)", value=False)
 if st.button("Rodar simulação"):
     debts_prepared = prepare_debts(dividas_edit, inpc_aa)
-    timeline_df, payoff_df, final_debts = simulate(debts_prepared, st.session_state["aportes_edit"], horizonte_meses, BASE_START)
+    marginal_df = None
+    if marginal:
+        # todos os pares (mês, dívida) numa passada em lote; cacheado como as demais simulações
+        ap_marg = aportes_to_array(st.session_state.get("aportes_edit", aportes_df), horizonte_meses)
+        res_marg = simulation_cache.get_or_compute(
+            simulation_key(debts_prepared, ap_marg, horizonte_meses, BASE_START, "marginal"),
+            lambda: marginal_value(debts_prepared, ap_marg, horizonte_meses), disk_dir=cache_dir,
+        )
+        marginal_df = marginal_frame(debts_prepared, res_marg, BASE_START)
+    # o detalhe da rodada anterior (e seus .npy, se foi para o disco) é descartado
+    st.session_state.pop("detalhe_simulacao", None)
+    shutil.rmtree(st.session_state.pop("detalhe_pasta", ""), ignore_errors=True)
+    if detalhar:
+        # o detalhe sempre usa o motor mês a mês em arrays e não passa pelo cache;
+        # acima de DETALHE_SPILL_BYTES as matrizes vão para .npy numa pasta desta rodada
+        detalhe_pasta = os.path.join(cache_pasta, "detalhe", uuid.uuid4().hex)
+        timeline_df, payoff_df, final_debts, detalhe_sim = simulate_vectorized(
+            debts_prepared, st.session_state.get("aportes_edit", aportes_df), horizonte_meses, BASE_START,
+            detalhe=alloc_detail(horizonte_meses, len(debts_prepared), spill_dir=detalhe_pasta),
+        )
+        st.session_state["detalhe_simulacao"] = (detalhe_sim, list(debts_prepared["id"]))
+        st.session_state["detalhe_pasta"] = detalhe_pasta
+    else:
+        if "simulador_incremental" not in st.session_state:
+            st.session_state["simulador_incremental"] = IncrementalSimulator()
+        sim_inc = st.session_state["simulador_incremental"]
+        sim_inc.ultimo_inicio = None
+        timeline_df, payoff_df, final_debts = simulate(debts_prepared, st.session_state.get("aportes_edit", aportes_df), horizonte_meses, BASE_START, incremental=sim_inc)
+        if sim_inc.ultimo_inicio is not None and sim_inc.ultimo_inicio > 1:
+            st.caption(f"Recalculado a partir do mês {sim_inc.ultimo_inicio} (meses anteriores reaproveitados da última simulação).")
 
     st.success("Simulação concluída.")
     c1, c2 = st.columns([1,1])
@@ -243,6 +271,11 @@ if st.button("Rodar simulação"):
     with c2:
         st.markdown("#### Data de quitação por dívida")
         st.dataframe(payoff_df, use_container_width=True)
+        if marginal_df is not None:
+            st.markdown("#### Onde o próximo R$ rende mais")
+            st.dataframe(marginal_df.head(15), use_container_width=True, hide_index=True)
+            st.caption("Juros economizados (dentro do horizonte) por R$ 1 extra pago direto na dívida naquele mês, "
+                       "comparado a R$ 1 a mais no aporte do mês seguindo a prioridade (cascata).")
 
     st.markdown("#### Gráficos")
     fig1, ax1 = plt.subplots()
@@ -262,13 +295,54 @@ if st.button("Rodar simulação"):
     ax2.set_title("Fluxos mensais")
     st.pyplot(fig2)
 
-    with pd.ExcelWriter("simulacao_dividas.xlsx", engine="xlsxwriter") as writer:
-        timeline_df.to_excel(writer, index=False, sheet_name="timeline")
-        payoff_df.to_excel(writer, index=False, sheet_name="quitacao")
-        debts_prepared.to_excel(writer, index=False, sheet_name="dividas_usadas")
-    st.markdown("[Baixar planilha da simulação (XLSX)](simulacao_dividas.xlsx)")
+    st.session_state["export_simulacao"] = {"timeline": timeline_df, "quitacao": payoff_df, "dividas_usadas": debts_prepared}
+    if marginal_df is not None:
+        st.session_state["export_simulacao"]["valor_marginal"] = marginal_df
+    if "detalhe_simulacao" in st.session_state:
+        detalhe_sim, ids_sim = st.session_state["detalhe_simulacao"]
+        for campo in DETALHE_CAMPOS:
+            st.session_state["export_simulacao"][f"det_{campo}"] = detail_frame(detalhe_sim, campo, ids_sim).reset_index()
+    st.session_state.pop("export_simulacao_arquivo", None)
+
+if "detalhe_simulacao" in st.session_state:
+    st.markdown("#### Detalhe por dívida (mês × dívida)")
+    detalhe_sim, ids_sim = st.session_state["detalhe_simulacao"]
+    campo_det = st.selectbox("Série", DETALHE_CAMPOS, format_func=lambda c: {"saldo": "Saldo ao fim do mês", "juros": "Juros do mês", "pagamento_minimo": "Pagamento mínimo", "aporte_aplicado": "Aporte aplicado"}[c])
+    st.dataframe(detail_frame(detalhe_sim, campo_det, ids_sim), use_container_width=True)
+
+export_controls("export_simulacao", "simulacao_dividas")
+
+st.markdown("#### Ordem ótima de quitação")
+st.caption("Compara a prioridade atual com avalanche (maior taxa), snowball (menor saldo) e a busca exata por todas as ordens (branch-and-bound), com os aportes da seção 2.")
+colo1, colo2 = st.columns([1,2])
+with colo1:
+    objetivo_ordem = st.selectbox("Objetivo", OBJETIVOS, format_func=lambda o: {"juros": "Menor juros total", "meses": "Quitar mais cedo"}[o])
+if st.button("Otimizar ordem"):
+    st.session_state["ordem_otima"] = optimize_order(
+        prepare_debts(dividas_edit, inpc_aa),
+        aportes_to_array(st.session_state.get("aportes_edit", aportes_df), horizonte_meses),
+        horizonte_meses,
+        objetivo_ordem,
+    )
+if "ordem_otima" in st.session_state:
+    ot = st.session_state["ordem_otima"]
+    colo3, colo4 = st.columns([1,1])
+    with colo3:
+        st.dataframe(ot["estrategias"], use_container_width=True, hide_index=True)
+        st.metric("Economia de juros vs. prioridade atual", f"R$ {ot['economia_juros']:,.2f}".replace(",", "X").replace(".", ",").replace("X","."), delta=f"{ot['economia_meses']} meses antes")
+        st.caption(f"{ot['avaliados']} ordens avaliadas" + ("" if ot["exato"] else " (carteira grande: só heurísticas)"))
+    with colo4:
+        st.dataframe(ot["prioridades"], use_container_width=True, hide_index=True)
+        if st.button("Aplicar prioridades sugeridas"):
+            nova = dict(zip(ot["prioridades"]["id"], ot["prioridades"]["prioridade_sugerida"]))
+            df_ap = st.session_state.get("dividas_edit", dividas_df).copy()
+            df_ap["prioridade"] = df_ap["id"].map(nova).fillna(df_ap["prioridade"]).astype(int)
+            st.session_state["dividas_df"] = df_ap
+            del st.session_state["ordem_otima"]
+            st.rerun()
 
 # ---------------- 4) Checklist do mês ----------------
+perf.marca("4) Checklist")
 st.markdown("### 4) Checklist do mês (pagamentos mínimos)")
 competencia_default = compute_competencia(date.today(), BASE_DAY)
 colc1, colc2 = st.columns([1,1])
@@ -278,18 +352,9 @@ with colc2:
     if st.button("Ir para competência atual"):
         competencia = compute_competencia(date.today(), BASE_DAY)
 
-pagamentos_path = "pagamentos.csv"
-if "pagamentos_df" not in st.session_state:
-    pg_saved = load_csv_if_exists(pagamentos_path)
-    if isinstance(pg_saved, pd.DataFrame):
-        st.session_state["pagamentos_df"] = pg_saved
-    else:
-        st.session_state["pagamentos_df"] = pd.DataFrame(columns=["competencia","id","pago","data_pagamento"])
-
-pag_df = st.session_state["pagamentos_df"].copy()
-
+# livro de pagamentos em SQLite (pagamentos.sqlite); o pagamentos.csv antigo é migrado na 1ª abertura
 base = pd.DataFrame({"id": dividas_edit["id"], "nome": dividas_edit["nome"], "parcela": dividas_edit["parcela"]})
-reg = pag_df[pag_df["competencia"] == competencia].copy()
+reg = read_competencia(competencia)
 status = base.merge(reg, how="left", on="id")
 status["competencia"] = competencia
 status["pago"] = status["pago"].fillna(False)
@@ -311,22 +376,19 @@ status_edit = st.data_editor(
 col_s1, col_s2, col_s3 = st.columns([1,1,1])
 with col_s1:
     if st.button("Salvar checklist do mês"):
-        other = pag_df[pag_df["competencia"] != competencia]
-        tosave = status_edit[["competencia","id","pago","data_pagamento"]].copy()
-        st.session_state["pagamentos_df"] = pd.concat([other, tosave], ignore_index=True)
-        save_csv(st.session_state["pagamentos_df"], pagamentos_path)
+        save_competencia(status_edit, competencia)
         st.success(f"Checklist salvo para {competencia}.")
 with col_s2:
     if st.button("Marcar todos como pagos"):
         status_edit["pago"] = True
-        st.session_state["pagamentos_df"] = pd.concat([pag_df[pag_df["competencia"] != competencia], status_edit[["competencia","id","pago","data_pagamento"]]], ignore_index=True)
-        save_csv(st.session_state["pagamentos_df"], pagamentos_path)
+        save_competencia(status_edit, competencia)
         st.success(f"Todas as parcelas marcadas como pagas para {competencia}.")
 with col_s3:
     pend = status_edit[~status_edit["pago"]]["parcela"].sum()
     st.metric("Total pendente (mínimos) nesta competência", f"R$ {pend:,.2f}".replace(",", "X").replace(".", ",").replace("X","."))
 
 # ---------------- 5) Comparador de cenários ----------------
+perf.marca("5) Cenários")
 st.markdown("### 5) Comparador de cenários (aporte e INPC)")
 colx1, colx2, colx3 = st.columns([1,1,1])
 with colx1:
@@ -338,31 +400,13 @@ with colx3:
     aporte_B = st.number_input("Aporte fixo cenário B (R$)", min_value=0.0, value=2000.0, step=100.0)
     inpc_B = st.number_input("INPC a.a. cenário B (%)", min_value=0.0, max_value=25.0, value=inpc_aa, step=0.1, key="inpc_B")
 
-def make_aportes_constantes(v, n):
-    return pd.DataFrame({"mes": list(range(1, int(n)+1)), "aporte": [float(v)]*int(n)})
-
 def prepare_debts_local():
     return st.session_state.get("dividas_edit", dividas_df).copy()
 
-def run_and_summarize(dividas_local, aporte_const, inpc):
-    debts = prepare_debts(dividas_local, inpc)
-    ap = make_aportes_constantes(aporte_const, meses_cmp)
-    timeline, payoff, _ = simulate(debts, ap, meses_cmp, BASE_START)
-    meses_quit = int(timeline["mes"].iloc[-1])
-    saldo_final = float(timeline["saldo_total"].iloc[-1])
-    quitou = saldo_final <= 0.01
-    return {
-        "timeline": timeline,
-        "payoff": payoff,
-        "meses_quitacao": meses_quit,
-        "saldo_final": saldo_final,
-        "status": "QUITADO" if quitou else "NÃO QUITADO"
-    }
-
 if st.button("Comparar cenários"):
     div_local = prepare_debts_local()
-    resA = run_and_summarize(div_local, aporte_A, inpc_A)
-    resB = run_and_summarize(div_local, aporte_B, inpc_B)
+    resA = run_and_summarize(div_local, aporte_A, inpc_A, meses_cmp, BASE_START, simulate_fn=simulate, prepare_fn=prepare_debts)
+    resB = run_and_summarize(div_local, aporte_B, inpc_B, meses_cmp, BASE_START, simulate_fn=simulate, prepare_fn=prepare_debts)
 
     colr1, colr2 = st.columns([1,1])
     with colr1:
@@ -384,14 +428,130 @@ if st.button("Comparar cenários"):
     axc.legend()
     st.pyplot(figc)
 
-    with pd.ExcelWriter("comparacao_cenarios.xlsx", engine="xlsxwriter") as writer:
-        resA["timeline"].to_excel(writer, index=False, sheet_name="A_timeline")
-        resA["payoff"].to_excel(writer, index=False, sheet_name="A_quitacao")
-        resB["timeline"].to_excel(writer, index=False, sheet_name="B_timeline")
-        resB["payoff"].to_excel(writer, index=False, sheet_name="B_quitacao")
-    st.markdown("[Baixar planilha de comparação (XLSX)](comparacao_cenarios.xlsx)")
+    st.session_state["export_comparacao"] = {
+        "A_timeline": resA["timeline"], "A_quitacao": resA["payoff"],
+        "B_timeline": resB["timeline"], "B_quitacao": resB["payoff"],
+    }
+    st.session_state.pop("export_comparacao_arquivo", None)
+
+export_controls("export_comparacao", "comparacao_cenarios")
+
+st.markdown("#### Meta de quitação (busca automática)")
+st.caption("Em vez de ajustar aporte/INPC na mão: informe a data-alvo e/ou o teto de juros e o simulador acha o menor aporte constante ou o maior INPC que ainda cumpre a meta (usa o horizonte de comparação acima).")
+colgs1, colgs2, colgs3 = st.columns([1,1,1])
+with colgs1:
+    gs_modo = st.radio("Procurar", ["Menor aporte mensal", "Maior INPC tolerado"], key="gs_modo")
+with colgs2:
+    gs_usar_prazo = st.checkbox("Quitar até a data", value=True, key="gs_usar_prazo")
+    gs_data = st.date_input("Data-alvo", value=date(2029, 12, BASE_DAY), min_value=BASE_START.date(), key="gs_data")
+with colgs3:
+    gs_usar_juros = st.checkbox("Teto de juros totais", value=False, key="gs_usar_juros")
+    gs_juros_max = st.number_input("Juros máximos (R$)", min_value=0.0, value=80000.0, step=1000.0, key="gs_juros_max")
+
+if st.button("Buscar meta"):
+    # mês m da simulação cai em BASE_START + (m-1) meses
+    gs_prazo = (gs_data.year - BASE_START.year) * 12 + gs_data.month - BASE_START.month + 1 if gs_usar_prazo else None
+    gs_teto = float(gs_juros_max) if gs_usar_juros else None
+    if gs_prazo is None and gs_teto is None:
+        st.warning("Marque ao menos uma meta (data ou teto de juros).")
+    else:
+        if gs_modo == "Menor aporte mensal":
+            res_gs = solve_aporte(prepare_debts(prepare_debts_local(), inpc_aa), meses_cmp, prazo=gs_prazo, juros_max=gs_teto)
+        else:
+            res_gs = solve_inpc(
+                prepare_debts(prepare_debts_local(), 0.0),
+                aportes_to_array(st.session_state.get("aportes_edit", aportes_df), meses_cmp),
+                meses_cmp, prazo=gs_prazo, juros_max=gs_teto,
+            )
+        if not res_gs["viavel"]:
+            st.error("Meta inalcançável no horizonte de comparação" + (" nem com INPC 0%." if gs_modo != "Menor aporte mensal" else "."))
+        else:
+            if gs_modo == "Menor aporte mensal":
+                aporte_gs = f"R$ {res_gs['valor']:,.2f}".replace(",", "X").replace(".", ",").replace("X",".")
+                st.success(f"Aporte mínimo: **{aporte_gs}** por mês (INPC {inpc_aa:.2f}% a.a.)")
+            elif res_gs["limite"]:
+                st.success(f"A meta vale para qualquer INPC até {res_gs['valor']:.0f}% a.a. com os aportes da seção 2.")
+            else:
+                st.success(f"INPC máximo tolerado: **{res_gs['valor']:.4f}% a.a.** com os aportes da seção 2.")
+            quitacao_gs = add_months(BASE_START, res_gs["meses"] - 1).strftime("%m/%Y") if res_gs["meses"] else "—"
+            juros_gs = f"R$ {res_gs['juros_total']:,.2f}".replace(",", "X").replace(".", ",").replace("X",".")
+            st.caption(f"Quitação em {quitacao_gs} — juros totais {juros_gs} — {res_gs['avaliados']} cenários simulados em {res_gs['iteracoes']} rodadas.")
+
+st.markdown("#### Superfície de cenários (aporte × INPC)")
+st.caption("Roda toda a grade de uma vez (cenários × dívidas em arrays) e mostra mês de quitação e juros totais.")
+colg1, colg2, colg3 = st.columns([1,1,1])
+with colg1:
+    grid_ap_min = st.number_input("Aporte mínimo (R$)", min_value=0.0, value=0.0, step=100.0)
+    grid_ap_max = st.number_input("Aporte máximo (R$)", min_value=0.0, value=5000.0, step=100.0)
+with colg2:
+    grid_inpc_min = st.number_input("INPC mínimo a.a. (%)", min_value=0.0, max_value=25.0, value=0.0, step=0.5)
+    grid_inpc_max = st.number_input("INPC máximo a.a. (%)", min_value=0.0, max_value=25.0, value=12.0, step=0.5)
+with colg3:
+    grid_n_ap = st.number_input("Níveis de aporte", min_value=2, max_value=200, value=50, step=1)
+    grid_n_inpc = st.number_input("Níveis de INPC", min_value=2, max_value=200, value=40, step=1)
+
+if st.button("Gerar superfície"):
+    grid = scenario_grid(
+        prepare_debts(prepare_debts_local(), 0.0),
+        np.linspace(grid_ap_min, grid_ap_max, int(grid_n_ap)),
+        np.linspace(grid_inpc_min, grid_inpc_max, int(grid_n_inpc)),
+        meses_cmp,
+    )
+    extent = [grid_inpc_min, grid_inpc_max, grid_ap_min, grid_ap_max]
+    figg, (axg1, axg2) = plt.subplots(1, 2, figsize=(12, 4.5))
+    im1 = axg1.imshow(grid["meses_quitacao"], origin="lower", aspect="auto", extent=extent)
+    axg1.set_title("Mês de quitação (vazio = não quita no horizonte)")
+    im2 = axg2.imshow(grid["juros_total"], origin="lower", aspect="auto", extent=extent)
+    axg2.set_title("Juros totais no horizonte (R$)")
+    for ax_, im_ in ((axg1, im1), (axg2, im2)):
+        ax_.set_xlabel("INPC a.a. (%)")
+        ax_.set_ylabel("Aporte mensal (R$)")
+        figg.colorbar(im_, ax=ax_)
+    st.pyplot(figg)
+    st.caption(f"{grid['quitou'].sum()} de {grid['quitou'].size} cenários quitam em até {meses_cmp} meses.")
+    ap_g, inpc_g = np.meshgrid(grid["aporte"], grid["inpc"], indexing="ij")
+    st.session_state["export_superficie"] = {"superficie": pd.DataFrame({
+        "aporte": ap_g.ravel(), "inpc_aa": inpc_g.ravel(),
+        "meses_quitacao": grid["meses_quitacao"].ravel(), "juros_total": grid["juros_total"].ravel(),
+        "saldo_final": grid["saldo_final"].ravel(), "quitou": grid["quitou"].ravel(),
+    })}
+    st.session_state.pop("export_superficie_arquivo", None)
+
+export_controls("export_superficie", "superficie_cenarios")
+
+st.markdown("#### Monte Carlo do INPC (FUNCEF variável)")
+st.caption(f"Sorteia caminhos mensais de INPC a partir do INPC da barra lateral e usa os aportes da seção 2. Se existir `{INPC_HISTORICO_PATH}` (coluna `inpc_aa`), a dinâmica do modelo é ajustada a ele.")
+try:
+    hist = load_inpc_history()
+except ValueError as e:
+    hist = None
+    st.warning(f"Histórico do INPC ignorado ({e}); usando a volatilidade e a persistência abaixo.")
+colm1, colm2, colm3 = st.columns([1,1,1])
+with colm1:
+    mc_modelo = st.selectbox("Modelo do INPC", INPC_MODELOS, format_func=lambda m: {"ar1": "AR(1)", "passeio_aleatorio": "Passeio aleatório"}[m])
+    mc_caminhos = st.number_input("Número de caminhos", min_value=100, max_value=100000, value=10000, step=1000)
+with colm2:
+    # com histórico, sigma e phi saem do ajuste e os campos ficam travados
+    ajuda_hist = f"Ajustado a `{INPC_HISTORICO_PATH}`; remova o arquivo para definir à mão." if hist is not None else None
+    mc_sigma = st.number_input("Volatilidade mensal (p.p. a.a.)", min_value=0.0, max_value=5.0, value=0.3, step=0.05, disabled=hist is not None, help=ajuda_hist)
+    mc_phi = st.number_input("Persistência AR(1) (phi)", min_value=0.0, max_value=0.999, value=0.95, step=0.01, disabled=hist is not None, help=ajuda_hist)
+with colm3:
+    mc_seed = st.number_input("Semente", min_value=0, value=42, step=1)
+
+if st.button("Rodar Monte Carlo"):
+    if hist is not None:
+        mc_params = fit_inpc_model(hist, mc_modelo)
+        mc_params["x0"] = float(inpc_aa)
+        st.caption(f"Modelo ajustado ao histórico ({len(hist)} meses): " + ", ".join(f"{k}={v:.4f}" for k, v in mc_params.items() if k != "modelo"))
+    else:
+        mc_params = default_inpc_model(inpc_aa, mc_modelo, sigma=mc_sigma, phi=mc_phi)
+    debts_mc = prepare_debts(dividas_edit, 0.0)
+    ap_mc = aportes_to_array(st.session_state.get("aportes_edit", aportes_df), horizonte_meses)
+    res_mc = monte_carlo(debts_mc, ap_mc, horizonte_meses, mc_params, n_paths=int(mc_caminhos), seed=int(mc_seed))
+    st.dataframe(summarize_monte_carlo(debts_mc, res_mc, BASE_START), use_container_width=True)
 
 # ---------------- 6) Visão do mês (dashboard rápido) ----------------
+perf.marca("6) Visão do mês")
 st.markdown("### 6) Visão do mês (dashboard rápido)")
 try:
     _div = st.session_state["dividas_edit"].copy()
@@ -400,12 +560,8 @@ try:
     st.caption(f"Competência atual (base dia {BASE_DAY}): **{competencia_dash}**")
     total_minimos = float(_div.loc[_div["saldo_atual"] > 0, "parcela"].sum())
     aporte_mes = float(_apo.loc[_apo["mes"] == 1, "aporte"].sum()) if "mes" in _apo.columns else 0.0
-    try:
-        _pag = pd.read_csv("pagamentos.csv")
-    except Exception:
-        _pag = pd.DataFrame(columns=["competencia","id","pago","data_pagamento"])
     base_comp = _div[["id", "parcela"]].copy()
-    pagos_comp = _pag[_pag["competencia"] == competencia_dash].copy().merge(base_comp, on="id", how="left")
+    pagos_comp = read_competencia(competencia_dash).merge(base_comp, on="id", how="left")
     total_pago_mes = float(pagos_comp.loc[pagos_comp["pago"] == True, "parcela"].sum())
     pendente_mes = max(0.0, total_minimos - total_pago_mes)
     total_parcelas_original = float(_div["parcela"].sum())
@@ -430,18 +586,58 @@ try:
 except Exception as e:
     st.info("Edite suas dívidas e aportes acima para habilitar a 'Visão do mês'.")
 
+st.markdown("#### Plano × realizado (livro de pagamentos)")
+st.caption("Reproduz as competências registradas no checklist desde o início do plano: parcela não marcada como paga não abate o saldo e acumula juros. Meses sem nenhum registro seguem o plano. A partir do saldo real, reprojeta a quitação.")
+replay_aportes = st.checkbox("Considerar os aportes do plano como feitos", value=True, key="replay_aportes")
+# só a última competência do livro até a atual conta como realizada
+ultima_comp = last_competencia()
+replay_ate = min(ultima_comp, compute_competencia(date.today(), BASE_DAY)) if ultima_comp else None
+try:
+    debts_replay = prepare_debts(dividas_edit, inpc_aa)
+    ap_replay = aportes_to_array(st.session_state.get("aportes_edit", aportes_df), horizonte_meses)
+    # o resultado só muda quando o livro muda (versão) ou o plano muda; reruns reaproveitam o cache
+    chave_replay = simulation_key(debts_replay, ap_replay, horizonte_meses, BASE_START, "replay", ledger_version(), replay_ate, replay_aportes)
+    res_rp = simulation_cache.get_or_compute(
+        chave_replay, lambda: replay(debts_replay, ap_replay, horizonte_meses, BASE_START, ate=replay_ate, aportes_feitos=replay_aportes), disk_dir=cache_dir,
+    )
+except (KeyError, ValueError):
+    res_rp = None
+if res_rp is None:
+    st.info("Corrija as dívidas acima para comparar o plano com o realizado.")
+elif res_rp["meses_realizados"] == 0:
+    st.caption(f"Nenhuma competência registrada desde {BASE_START:%m/%Y}: o realizado ainda é o próprio plano.")
+else:
+    k_rp = res_rp["meses_realizados"]
+    saldo_real_rp, saldo_plano_rp = float(res_rp["saldo_real"].sum()), float(res_rp["saldo_plano"].sum())
+    fim_plano = int(res_rp["payoff_plano"].max()) if (res_rp["payoff_plano"] > 0).all() else None
+    fim_real = int(res_rp["payoff_reprojetado"].max()) if (res_rp["payoff_reprojetado"] > 0).all() else None
+    colp1, colp2, colp3 = st.columns(3)
+    colp1.metric(f"Saldo real após {k_rp} competências ({res_rp['registradas']} registradas)", f"R$ {saldo_real_rp:,.2f}".replace(",", "X").replace(".", ",").replace("X","."),
+                 delta=f"R$ {saldo_real_rp - saldo_plano_rp:,.2f} vs plano".replace(",", "X").replace(".", ",").replace("X","."), delta_color="inverse")
+    colp2.metric("Juros totais reprojetados", f"R$ {res_rp['juros_reprojetado']:,.2f}".replace(",", "X").replace(".", ",").replace("X","."),
+                 delta=f"R$ {res_rp['juros_reprojetado'] - res_rp['juros_plano']:,.2f} vs plano".replace(",", "X").replace(".", ",").replace("X","."), delta_color="inverse")
+    colp3.metric("Quitação total reprojetada", add_months(BASE_START, fim_real - 1).strftime("%m/%Y") if fim_real else "fora do horizonte",
+                 delta=f"{fim_real - fim_plano} meses vs plano" if fim_real and fim_plano else None, delta_color="inverse")
+    st.dataframe(drift_frame(debts_replay, res_rp, BASE_START), use_container_width=True, hide_index=True)
+
+    figp, axp = plt.subplots()
+    axp.plot(np.arange(1, len(res_rp["saldo_total_plano"]) + 1), res_rp["saldo_total_plano"], label="Plano")
+    axp.plot(np.arange(1, len(res_rp["saldo_total_real"]) + 1), res_rp["saldo_total_real"], label="Realizado + reprojeção")
+    axp.axvline(k_rp, color="gray", linestyle=":", label=f"Última competência ({res_rp['competencias'][-1]})")
+    axp.set_xlabel("Mês")
+    axp.set_ylabel("Saldo total (R$)")
+    axp.set_title("Plano × realizado")
+    axp.legend()
+    st.pyplot(figp)
+
 # ---------------- 7) Tickar parcelas pagas agora (atalho) ----------------
+perf.marca("7) Atalho")
 st.markdown("### 7) Tickar parcelas pagas agora (atalho)")
 try:
     comp_quick = compute_competencia(date.today(), BASE_DAY)
     st.caption(f"Competência sugerida: **{comp_quick}**")
-    try:
-        pag_quick = pd.read_csv("pagamentos.csv")
-    except Exception:
-        pag_quick = pd.DataFrame(columns=["competencia","id","pago","data_pagamento"])
-
     base_quick = pd.DataFrame({"id": dividas_edit["id"], "nome": dividas_edit["nome"], "parcela": dividas_edit["parcela"]})
-    reg_quick = pag_quick[pag_quick["competencia"] == comp_quick].copy()
+    reg_quick = read_competencia(comp_quick)
     status_quick = base_quick.merge(reg_quick, how="left", on="id")
     status_quick["competencia"] = comp_quick
     status_quick["pago"] = status_quick["pago"].fillna(False)
@@ -462,13 +658,30 @@ try:
     qc1, qc2 = st.columns([1,1])
     with qc1:
         if st.button("Salvar agora (atalho)"):
-            other = pag_quick[pag_quick["competencia"] != comp_quick]
-            tosave = quick_edit[["competencia","id","pago","data_pagamento"]].copy()
-            new_df = pd.concat([other, tosave], ignore_index=True)
-            new_df.to_csv("pagamentos.csv", index=False)
+            save_competencia(quick_edit, comp_quick)
             st.success(f"Pagamentos salvos para {comp_quick}.")
     with qc2:
         pend_q = quick_edit[~quick_edit["pago"]]["parcela"].sum()
         st.metric("Pendente após marcação", f"R$ {pend_q:,.2f}".replace(",", "X").replace(".", ",").replace("X","."))
 except Exception as e:
     st.info("Preencha as dívidas acima para habilitar o atalho de marcação rápida.")
+
+# ---------------- Cache (contadores na barra lateral) ----------------
+_cs = simulation_cache.stats()
+cache_stats_box.caption(f"Acertos: **{_cs['hits']}** (memória) + **{_cs['disk_hits']}** (disco) — Faltas: **{_cs['misses']}** — Itens: {_cs['itens']}")
+
+# ---------------- Desempenho (painel na barra lateral) ----------------
+reg_perf = perf.finish(perf_log_path)
+st.session_state.pop("perf_ativo", None)
+with perf_box:
+    st.caption(f"Última execução: **{reg_perf['total_ms']:.0f} ms**")
+    st.dataframe(
+        pd.DataFrame(
+            [{"etapa": k, "chamadas": None, "ms": v} for k, v in reg_perf["secoes"].items()]
+            + [{"etapa": k, "chamadas": c["n"], "ms": c["ms"]} for k, c in reg_perf["chamadas"].items()]
+        ),
+        use_container_width=True,
+        hide_index=True,
+    )
+    if "cprofile" in reg_perf:
+        st.code(reg_perf["cprofile"], language=None)
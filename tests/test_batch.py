@@ -0,0 +1,70 @@
+import pandas as pd
+import pytest
+
+from benchmarks import synthetic
+from dividas.batch import iter_clients_dir, iter_clients_long, run_batch
+from dividas.core import make_aportes_constantes, run_and_summarize
+
+MESES = 48  # curto o bastante para parte dos clientes não quitar
+INPC = 4.7
+APORTE_PADRAO = 700.0
+# cliente -> (nº de dívidas, aporte constante do plano ou None = sem aportes.csv)
+CLIENTES = {"c01": (3, 400.0), "c02": (7, None), "c03": (1, 0.0), "c04": (12, 2500.0), "c05": (5, None)}
+
+
+def carteiras():
+    return {c: synthetic.portfolio(n, seed=i) for i, (c, (n, _)) in enumerate(CLIENTES.items())}
+
+
+def resumo(path):
+    return pd.read_csv(path, dtype={"cliente": str}).set_index("cliente")
+
+
+def assert_matches_run_and_summarize(saida, dfs):
+    out = resumo(saida)
+    assert list(out.index) == list(CLIENTES)
+    for c, df in dfs.items():
+        aporte = CLIENTES[c][1]
+        ref = run_and_summarize(df, APORTE_PADRAO if aporte is None else aporte, INPC, MESES)
+        assert out.loc[c, "dividas"] == len(df)
+        assert out.loc[c, "status"] == ref["status"]
+        assert out.loc[c, "meses_quitacao"] == ref["meses_quitacao"]
+        assert out.loc[c, "saldo_final"] == pytest.approx(ref["saldo_final"], abs=0.01)
+    assert set(out["status"]) == {"QUITADO", "NÃO QUITADO"}
+
+
+def test_directory_input(tmp_path):
+    dfs = carteiras()
+    for c, df in dfs.items():
+        pasta = tmp_path / "clientes" / c
+        pasta.mkdir(parents=True)
+        df.to_csv(pasta / "dividas.csv", index=False)
+        if CLIENTES[c][1] is not None:
+            make_aportes_constantes(CLIENTES[c][1], MESES).to_csv(pasta / "aportes.csv", index=False)
+    saida = str(tmp_path / "resumo.csv")
+    # blocos de 2: carteiras de tamanhos diferentes na mesma simulação
+    total, erros = run_batch(iter_clients_dir(str(tmp_path / "clientes"), MESES), saida, INPC, MESES,
+                             aporte_padrao=APORTE_PADRAO, workers=1, bloco=2)
+    assert (total, erros) == (len(CLIENTES), 0)
+    assert_matches_run_and_summarize(saida, dfs)
+
+
+def test_long_input(tmp_path):
+    dfs = carteiras()
+    pd.concat([df.assign(cliente=c) for c, df in dfs.items()]).to_csv(tmp_path / "dividas.csv", index=False)
+    pd.concat([
+        make_aportes_constantes(a, MESES).assign(cliente=c) for c, (_, a) in CLIENTES.items() if a is not None
+    ])[["cliente", "mes", "aporte"]].to_csv(tmp_path / "aportes.csv", index=False)
+    saida = str(tmp_path / "resumo.csv")
+    clients = iter_clients_long(str(tmp_path / "dividas.csv"), str(tmp_path / "aportes.csv"), MESES)
+    total, erros = run_batch(clients, saida, INPC, MESES, aporte_padrao=APORTE_PADRAO, workers=1, bloco=2)
+    assert (total, erros) == (len(CLIENTES), 0)
+    assert_matches_run_and_summarize(saida, dfs)
+
+
+def test_long_input_out_of_order(tmp_path):
+    dfs = carteiras()
+    pd.concat([dfs["c02"].assign(cliente="c02"), dfs["c01"].assign(cliente="c01")]).to_csv(tmp_path / "dividas.csv", index=False)
+    clients = iter_clients_long(str(tmp_path / "dividas.csv"), None, MESES)
+    with pytest.raises(ValueError, match="fora de ordem"):
+        run_batch(clients, str(tmp_path / "resumo.csv"), INPC, MESES, workers=1, bloco=2)
@@ -0,0 +1,48 @@
+import os
+import threading
+
+from dividas.cache import SimulationCache
+
+
+def test_disk_dir_is_per_call(tmp_path):
+    cache = SimulationCache()
+    cache.get_or_compute("a", lambda: 1, disk_dir=str(tmp_path))
+    cache.get_or_compute("b", lambda: 2)
+    assert sorted(os.listdir(tmp_path)) == ["a.pkl"]
+
+    outro = SimulationCache()
+    assert outro.get_or_compute("a", lambda: -1, disk_dir=str(tmp_path)) == 1
+    assert outro.get_or_compute("b", lambda: 3, disk_dir=str(tmp_path)) == 3
+    assert outro.stats() == {"hits": 0, "disk_hits": 1, "misses": 1, "itens": 2}
+
+
+def test_clear_removes_disk_tier(tmp_path):
+    cache = SimulationCache()
+    cache.get_or_compute("a", lambda: 1, disk_dir=str(tmp_path))
+    cache.clear(disk_dir=str(tmp_path))
+    assert not [n for n in os.listdir(tmp_path) if n.endswith(".pkl")]
+    assert cache.get_or_compute("a", lambda: 2, disk_dir=str(tmp_path)) == 2
+    assert cache.stats()["misses"] == 1
+
+
+def test_threads_share_memory_tier():
+    cache = SimulationCache(maxsize=8)
+    erros = []
+
+    def trabalho(t):
+        try:
+            for i in range(2000):
+                k = f"{(i * 7 + t) % 32}"
+                assert cache.get_or_compute(k, lambda k=k: int(k)) == int(k)
+        except Exception as e:  # repassado para a thread principal
+            erros.append(e)
+
+    threads = [threading.Thread(target=trabalho, args=(t,)) for t in range(8)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    assert not erros
+    s = cache.stats()
+    assert s["itens"] == 8
+    assert s["hits"] + s["misses"] == 8 * 2000
@@ -0,0 +1,93 @@
+import csv
+import io
+import os
+import warnings
+
+import pandas as pd
+import pytest
+
+from benchmarks import synthetic
+from dividas import core
+from dividas.core import load_csv_if_exists, prepare_debts, prepare_rows
+
+
+def dict_reader(df):
+    # o que a CLI e o lote recebem: tudo texto, vazio = ""
+    buf = io.StringIO()
+    df.to_csv(buf, index=False)
+    buf.seek(0)
+    return list(csv.DictReader(buf))
+
+
+def test_prepare_rows_matches_prepare_debts_on_csv_text():
+    df = synthetic.portfolio(12, seed=5)
+    df["prioridade"] = df["prioridade"].astype(object)
+    df.loc[0, "prioridade"] = 0      # 0 = sem prioridade -> vai para o fim
+    df.loc[1, "prioridade"] = ""     # vazio idem
+    df.loc[2, "prioridade"] = 0.4    # trunca para 0
+    df.loc[3, "prioridade"] = "2.7"
+    esperado = prepare_debts(df, 4.7)
+    for records in (dict_reader(df), df.to_dict("records")):
+        rows = pd.DataFrame(prepare_rows(records, 4.7))
+        assert list(rows["id"]) == list(esperado["id"])
+        assert list(rows["prioridade"]) == list(esperado["prioridade"])
+    assert set(esperado["prioridade"].iloc[-3:]) == {999}
+
+
+def test_prepare_debts_blank_cells_without_warnings():
+    # colunas object (data_editor / default_debts): "" e espaços contam como vazio
+    df = synthetic.portfolio(4, seed=1).astype(object)
+    df.loc[0, "juros_aa"] = "   "
+    df.loc[1, "saldo_atual"] = ""
+    df.loc[2, "prioridade"] = None
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        debts = prepare_debts(df, 4.7)
+    por_id = debts.set_index("id")
+    assert por_id.loc[df.loc[0, "id"], "rate_m"] == 0.0  # dívida "Fixo" sem juros_aa
+    assert por_id.loc[df.loc[1, "id"], "saldo"] == 0.0
+    assert por_id.loc[df.loc[2, "id"], "prioridade"] == 999
+
+
+def test_load_csv_fractional_priority_and_errors(tmp_path):
+    path = tmp_path / "dividas.csv"
+    df = synthetic.portfolio(3, seed=2)
+    df["prioridade"] = [2.5, 1, None]
+    df.to_csv(path, index=False)
+    lido = load_csv_if_exists(str(path))
+    assert list(prepare_debts(lido, 4.7)["prioridade"]) == [1, 2, 999]
+
+    df["saldo_atual"] = df["saldo_atual"].astype(object)
+    df.loc[0, "saldo_atual"] = "abc"
+    df.to_csv(path, index=False)
+    assert load_csv_if_exists(str(path)) is None
+    with pytest.raises(ValueError):
+        load_csv_if_exists(str(path), raise_errors=True)
+
+
+def test_load_csv_cache_reparses_only_after_change(tmp_path, monkeypatch):
+    path = str(tmp_path / "dividas.csv")
+    synthetic.portfolio(4, seed=3).to_csv(path, index=False)
+    leituras = []
+    ler = core.read_typed_csv
+    monkeypatch.setattr(core, "read_typed_csv", lambda *a, **k: leituras.append(a[0]) or ler(*a, **k))
+
+    a = load_csv_if_exists(path)
+    a.loc[0, "saldo_atual"] = -1.0  # a cópia devolvida não altera o cache
+    b = load_csv_if_exists(path)
+    assert len(leituras) == 1 and b.loc[0, "saldo_atual"] != -1.0
+
+    # mesmo tamanho, mtime novo
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    load_csv_if_exists(path)
+    assert len(leituras) == 2
+
+    # mesmo mtime, tamanho novo
+    st = os.stat(path)
+    synthetic.portfolio(5, seed=3).to_csv(path, index=False)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert len(load_csv_if_exists(path)) == 5
+    assert len(leituras) == 3
+    load_csv_if_exists(path)
+    assert len(leituras) == 3
@@ -0,0 +1,208 @@
+import itertools
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks import synthetic
+from dividas.core import BASE_START, load_csv_if_exists, make_aportes_constantes, prepare_debts, run_and_summarize
+from dividas.engine import aportes_to_array, debts_to_arrays, scenario_grid, simulate_arrays, simulate_batch, simulate_vectorized
+from dividas.events import simulate_event_driven
+from dividas.incremental import IncrementalSimulator
+from dividas.optimize import optimize_order
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# ---------------- Referência: laço por célula original ----------------
+# O `simulate` do app antes do motor em arrays, com a checagem de quitação
+# corrigida (`payoff` começa em NaT, então `is None` nunca era verdadeiro).
+def simulate_reference(debts_df, aportes_df, months, base_date):
+    debts = debts_df.copy()
+    aportes = aportes_df.set_index("mes")["aporte"].to_dict()
+    records = []
+    payoff = {row["id"]: pd.NaT for _, row in debts.iterrows()}
+    snowball_extra = 0.0
+    for m in range(1, months+1):
+        date = pd.Timestamp(base_date) + pd.DateOffset(months=m-1)
+        min_pay_total = 0.0
+        interest_this_month = 0.0
+
+        for idx in debts.index:
+            if debts.at[idx, "saldo"] <= 0.0:
+                continue
+            saldo0 = debts.at[idx, "saldo"]
+            rate_m = debts.at[idx, "rate_m"]
+            parcela = debts.at[idx, "parcela"]
+            saldo1 = saldo0 * (1.0 + rate_m)
+            interest_this_month += saldo0 * rate_m
+            pago = min(parcela, saldo1)
+            saldo2 = max(0.0, saldo1 - pago)
+            min_pay_total += pago
+            debts.at[idx, "saldo"] = saldo2
+
+        aporte = float(aportes.get(m, 0.0) or 0.0) + snowball_extra
+        extra_used = 0.0
+        for idx in debts.index:
+            if aporte <= 0.0:
+                break
+            if debts.at[idx, "saldo"] <= 0.0:
+                continue
+            saldo = debts.at[idx, "saldo"]
+            pago = min(aporte, saldo)
+            saldo -= pago
+            aporte -= pago
+            extra_used += pago
+            debts.at[idx, "saldo"] = saldo
+
+        newly_freed = 0.0
+        for idx in debts.index:
+            if debts.at[idx, "saldo"] <= 0.0 and pd.isna(payoff[debts.at[idx, "id"]]):
+                payoff[debts.at[idx, "id"]] = pd.Timestamp(date)
+                newly_freed += debts.at[idx, "parcela"]
+
+        snowball_extra += newly_freed
+
+        records.append({
+            "mes": m,
+            "data_ref": date.date().isoformat(),
+            "pago_minimo": round(min_pay_total, 2),
+            "aporte_extra_usado": round(extra_used, 2),
+            "snowball_para_prox": round(snowball_extra, 2),
+            "juros_do_mes": round(interest_this_month, 2),
+            "saldo_total": round(debts["saldo"].sum(), 2),
+        })
+
+        if debts["saldo"].sum() <= 0.01:
+            break
+
+    timeline = pd.DataFrame(records)
+    payoff_df = pd.DataFrame([
+        {"id": d["id"], "nome": d["nome"], "quitado_em": payoff[d["id"]].date().isoformat() if not pd.isna(payoff[d["id"]]) else None}
+        for _, d in debts_df.iterrows()
+    ])
+    return timeline, payoff_df, debts
+
+
+def aportes_variaveis(months, seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({"mes": np.arange(1, months + 1), "aporte": np.round(rng.uniform(0.0, 4000.0, months), 2)})
+
+
+def carteira(nome):
+    if nome == "dividas.csv":
+        return prepare_debts(load_csv_if_exists(os.path.join(ROOT, "dividas.csv")), 4.7)
+    return prepare_debts(synthetic.portfolio(12, seed=int(nome.split("-")[1])), 4.7)
+
+
+CARTEIRAS = ["dividas.csv", "sint-1", "sint-2", "sint-3"]
+APORTES = ["constante", "variavel"]
+
+
+def plano(debts, tipo, months=120):
+    if tipo == "constante":
+        return make_aportes_constantes(1500.0, months)
+    return aportes_variaveis(months, seed=len(debts))
+
+
+def assert_same(a, b):
+    pd.testing.assert_frame_equal(a[0].reset_index(drop=True), b[0].reset_index(drop=True), check_dtype=False, rtol=0, atol=0.01)
+    pd.testing.assert_frame_equal(a[1].reset_index(drop=True), b[1].reset_index(drop=True), check_dtype=False)
+
+
+# ---------------- Paridade dos motores ----------------
+@pytest.mark.parametrize("aportes", APORTES)
+@pytest.mark.parametrize("nome", CARTEIRAS)
+def test_vectorized_matches_reference(nome, aportes):
+    debts = carteira(nome)
+    ap = plano(debts, aportes)
+    assert_same(simulate_vectorized(debts, ap, 120, BASE_START), simulate_reference(debts, ap, 120, BASE_START))
+
+
+@pytest.mark.parametrize("aportes", APORTES)
+@pytest.mark.parametrize("nome", CARTEIRAS)
+def test_event_driven_matches_reference(nome, aportes):
+    debts = carteira(nome)
+    ap = plano(debts, aportes)
+    assert_same(simulate_event_driven(debts, ap, 120, BASE_START), simulate_reference(debts, ap, 120, BASE_START))
+
+
+# ---------------- Grade de cenários (aporte x INPC) ----------------
+@pytest.mark.parametrize("nome", ["dividas.csv", "sint-1"])
+def test_scenario_grid_matches_run_and_summarize(nome):
+    # a taxa das dívidas "INPC + Spread" é reconstruída de rate_m (inpc_parts/rates_from_inpc)
+    if nome == "dividas.csv":
+        df = load_csv_if_exists(os.path.join(ROOT, "dividas.csv"))
+    else:
+        df = synthetic.portfolio(12, seed=1)
+    assert (df["tipo"] == "INPC + Spread").any()
+    aportes, inpcs, meses = [0.0, 800.0, 2500.0], [0.0, 4.7, 12.0], 120
+    grid = scenario_grid(prepare_debts(df, 0.0), aportes, inpcs, meses)
+    for a, aporte in enumerate(aportes):
+        for i, inpc in enumerate(inpcs):
+            ref = run_and_summarize(df, aporte, inpc, meses)
+            assert grid["quitou"][a, i] == (ref["status"] == "QUITADO")
+            if grid["quitou"][a, i]:
+                assert grid["meses_quitacao"][a, i] == ref["meses_quitacao"]
+            else:
+                assert np.isnan(grid["meses_quitacao"][a, i])
+            assert grid["saldo_final"][a, i] == pytest.approx(ref["saldo_final"], abs=0.01)
+            # a linha do tempo arredonda os juros de cada mês
+            juros_ref = ref["timeline"]["juros_do_mes"].sum()
+            assert grid["juros_total"][a, i] == pytest.approx(juros_ref, abs=0.005 * len(ref["timeline"]))
+
+
+# ---------------- Re-simulação incremental ----------------
+def assert_same_arrays(res, ref):
+    assert res["meses"] == ref["meses"]
+    np.testing.assert_array_equal(res["payoff_mes"], ref["payoff_mes"])
+    np.testing.assert_allclose(res["saldo_final"], ref["saldo_final"], rtol=1e-12, atol=1e-9)
+    for k in ("pago_minimo", "aporte_extra_usado", "snowball_para_prox", "juros_do_mes", "saldo_total"):
+        np.testing.assert_allclose(res[k], ref[k], rtol=1e-12, atol=1e-9)
+
+
+@pytest.mark.parametrize("nome", CARTEIRAS)
+def test_incremental_matches_full_run(nome):
+    saldo, rate_m, parcela = debts_to_arrays(carteira(nome))
+    # aportes baixos: a carteira não quita em 24 meses, então aumentar o horizonte retoma do meio
+    ap = aportes_to_array(aportes_variaveis(180, seed=7), 180) * 0.05
+    sim = IncrementalSimulator()
+    edicoes = [
+        (ap, 24),           # primeira rodada
+        (ap, 120),          # horizonte maior: só os meses novos
+        (ap, 12),           # horizonte menor
+        (ap, 120),
+        (np.where(np.arange(180) == 40, ap + 2500.0, ap), 120),  # aporte alterado no mês 41
+        (np.where(np.arange(180) == 5, 0.0, ap), 120),           # aporte alterado no mês 6
+        (np.where(np.arange(180) == 5, 0.0, ap), 180),           # já quitou antes do mês 120: nada a refazer
+    ]
+    inicios = []
+    for aportes, months in edicoes:
+        res = sim.run(saldo, rate_m, parcela, aportes, months)
+        inicios.append(sim.ultimo_inicio)
+        assert_same_arrays(res, simulate_arrays(saldo, rate_m, parcela, aportes[:months], months))
+    assert inicios == [1, 25, None, None, 41, 6, None]
+
+
+# ---------------- Ordem ótima ----------------
+@pytest.mark.parametrize("objetivo", ["juros", "meses"])
+def test_optimize_order_matches_brute_force(objetivo):
+    # carteira em que a ótima é estritamente melhor que as três heurísticas
+    debts = prepare_debts(synthetic.portfolio(8, seed=4), 4.7)
+    ap = aportes_to_array(make_aportes_constantes(800.0, 120), 120)
+    saldo, rate_m, parcela = debts_to_arrays(debts)
+    orders = np.array(list(itertools.permutations(range(saldo.size))))
+    res = simulate_batch(saldo[orders], rate_m[orders], parcela[orders], np.broadcast_to(ap, (len(orders), ap.size)), 120)
+    juros = res["juros_do_mes"].sum(axis=1)
+    # "meses": menor mês de quitação, desempate por juros
+    melhor = int(np.argmin(juros) if objetivo == "juros" else np.lexsort((juros, res["meses"]))[0])
+
+    out = optimize_order(debts, ap, 120, objetivo=objetivo, workers=1)
+    assert out["exato"]
+    # a poda tem de valer a pena: bem menos ordens que as 8! da força bruta
+    assert out["avaliados"] < len(orders) // 2
+    est = out["estrategias"].set_index("estrategia")
+    assert est.loc["Ótima", "meses"] == res["meses"][melhor]
+    assert est.loc["Ótima", "juros_total"] == pytest.approx(round(juros[melhor], 2), abs=0.01)
+    assert est.loc["Ótima", "juros_total"] < est["juros_total"].iloc[:3].min() - 1.0
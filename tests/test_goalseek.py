@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+import pytest
+
+from dividas.core import load_csv_if_exists, make_aportes_constantes, prepare_debts
+from dividas.engine import aportes_to_array, debts_to_arrays, simulate_arrays
+from dividas.goalseek import INPC_MAX, TOL_APORTE, TOL_INPC, solve_aporte, solve_inpc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MESES = 120
+
+
+@pytest.fixture
+def df():
+    return load_csv_if_exists(os.path.join(ROOT, "dividas.csv"))
+
+
+def cumpre(debts, aportes, prazo, juros_max):
+    # a meta conferida por fora: uma simulação simples do plano completo
+    months = MESES if prazo is None else min(MESES, prazo)
+    res = simulate_arrays(*debts_to_arrays(debts), np.asarray(aportes, dtype=np.float64)[:months], months)
+    ok = res["saldo_final"].sum() <= 0.01
+    if prazo is not None:
+        ok &= res["meses"] <= prazo
+    if juros_max is not None:
+        ok &= res["juros_do_mes"].sum() <= juros_max + 1e-9
+    return bool(ok)
+
+
+@pytest.mark.parametrize("prazo,juros_max", [(48, None), (None, 20000.0), (60, 30000.0)])
+def test_solve_aporte_is_the_smallest_cent(df, prazo, juros_max):
+    debts = prepare_debts(df, 4.7)
+    out = solve_aporte(debts, MESES, prazo=prazo, juros_max=juros_max)
+    assert out["viavel"]
+    valor = out["valor"]
+    assert cumpre(debts, np.full(MESES, valor), prazo, juros_max)
+    assert not cumpre(debts, np.full(MESES, valor - TOL_APORTE), prazo, juros_max)
+
+
+def test_solve_aporte_infeasible(df):
+    # juros do 1º mês correm antes de qualquer aporte
+    out = solve_aporte(prepare_debts(df, 4.7), MESES, juros_max=0.0)
+    assert not out["viavel"] and out["valor"] is None
+
+
+@pytest.mark.parametrize("prazo,juros_max", [(60, None), (72, 90000.0)])
+def test_solve_inpc_is_the_largest_step(df, prazo, juros_max):
+    ap = aportes_to_array(make_aportes_constantes(1500.0, MESES), MESES)
+    out = solve_inpc(prepare_debts(df, 0.0), ap, MESES, prazo=prazo, juros_max=juros_max)
+    assert out["viavel"] and not out["limite"]
+    valor = out["valor"]
+    assert cumpre(prepare_debts(df, valor), ap, prazo, juros_max)
+    assert not cumpre(prepare_debts(df, valor + TOL_INPC), ap, prazo, juros_max)
+
+
+def test_solve_inpc_infeasible(df):
+    ap = aportes_to_array(make_aportes_constantes(1500.0, MESES), MESES)
+    out = solve_inpc(prepare_debts(df, 0.0), ap, MESES, prazo=48)
+    assert not out["viavel"] and out["valor"] is None
+    assert not cumpre(prepare_debts(df, 0.0), ap, 48, None)
+
+
+def test_solve_inpc_no_indexed_debt_hits_the_limit(df):
+    # sem dívida INPC + Spread a meta não depende do INPC
+    fixas = df[df["tipo"] != "INPC + Spread"].reset_index(drop=True)
+    ap = aportes_to_array(make_aportes_constantes(1500.0, MESES), MESES)
+    out = solve_inpc(prepare_debts(fixas, 0.0), ap, MESES, prazo=MESES)
+    assert out["viavel"] and out["limite"]
+    assert out["valor"] == INPC_MAX
@@ -0,0 +1,61 @@
+import pandas as pd
+import pytest
+
+from dividas import ledger
+
+
+def escrever_csv(path, linhas):
+    pd.DataFrame(linhas, columns=ledger.LEDGER_COLS).to_csv(path, index=False)
+
+
+@pytest.fixture
+def db(tmp_path):
+    return str(tmp_path / "pagamentos.sqlite")
+
+
+def test_migration_last_row_wins(tmp_path, db):
+    csv_path = str(tmp_path / "pagamentos.csv")
+    escrever_csv(csv_path, [
+        ("2025-08", "A", False, ""),
+        ("2025-08", "B", True, "2025-08-10"),
+        ("2025-08", "A", True, "2025-08-15"),  # regravação antiga: a última linha vale
+        ("2025-09", "A", "False", ""),
+    ])
+    ledger.connect(db, legacy_csv=csv_path).close()
+    ago = ledger.read_competencia("2025-08", path=db).set_index("id")
+    assert list(ago.index) == ["A", "B"]
+    assert bool(ago.loc["A", "pago"]) and ago.loc["A", "data_pagamento"] == "2025-08-15"
+    assert ledger.read_range("2025-09", "2025-09", path=db) == [("2025-09", "A", 0)]
+
+
+def test_migration_runs_once(tmp_path, db):
+    csv_path = str(tmp_path / "pagamentos.csv")
+    escrever_csv(csv_path, [("2025-08", "A", True, "")])
+    ledger.connect(db, legacy_csv=csv_path).close()
+    versao = ledger.ledger_version(db)
+
+    # o CSV muda depois da migração e o processo "reinicia" (esquece os bancos já abertos)
+    escrever_csv(csv_path, [("2025-08", "A", False, ""), ("2025-08", "Z", True, "")])
+    ledger._prontos.clear()
+    ledger.connect(db, legacy_csv=csv_path).close()
+    assert ledger.read_range("2025-08", "2025-08", path=db) == [("2025-08", "A", 1)]
+    assert ledger.ledger_version(db) == versao
+
+
+def test_save_competencia_replaces_only_that_month(db):
+    ledger.connect(db, legacy_csv=None).close()
+    v0 = ledger.ledger_version(db)
+    ledger.save_competencia(pd.DataFrame({"id": ["A", "B", "C"], "pago": [True, False, True], "data_pagamento": ""}), "2025-09", path=db)
+    ledger.save_competencia(pd.DataFrame({"id": ["A", "B"], "pago": [True, True], "data_pagamento": ""}), "2025-10", path=db)
+    v1 = ledger.ledger_version(db)
+
+    # C sai de 2025-09 e B passa a pago; 2025-10 fica como estava
+    ledger.save_competencia(pd.DataFrame({"id": ["A", "B"], "pago": [False, True], "data_pagamento": ["", "2025-09-20"]}), "2025-09", path=db)
+    v2 = ledger.ledger_version(db)
+    assert ledger.read_range("2025-09", "2025-09", path=db) == [("2025-09", "A", 0), ("2025-09", "B", 1)]
+    assert ledger.read_range("2025-10", "2025-10", path=db) == [("2025-10", "A", 1), ("2025-10", "B", 1)]
+    assert ledger.read_competencia("2025-09", path=db).set_index("id").loc["B", "data_pagamento"] == "2025-09-20"
+    assert ledger.last_competencia(db) == "2025-10"
+    # uma versão a mais por gravação
+    assert v1 == v0 + 2
+    assert v2 == v1 + 1
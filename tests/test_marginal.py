@@ -0,0 +1,55 @@
+import os
+
+import numpy as np
+import pytest
+
+from benchmarks import synthetic
+from dividas.core import load_csv_if_exists, prepare_debts
+from dividas.engine import aportes_to_array, debts_to_arrays, simulate_arrays
+from dividas.marginal import marginal_value
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MESES = 120
+
+
+def carteira(nome):
+    if nome == "dividas.csv":
+        debts = prepare_debts(load_csv_if_exists(os.path.join(ROOT, "dividas.csv")), 4.7)
+        return debts, aportes_to_array(load_csv_if_exists(os.path.join(ROOT, "aportes.csv")), MESES)
+    debts = prepare_debts(synthetic.portfolio(10, seed=int(nome.split("-")[1])), 4.7)
+    return debts, np.round(np.random.default_rng(3).uniform(0.0, 1500.0, MESES), 2)
+
+
+def juros_direcionado(saldo, rate_m, parcela, aportes, m, j):
+    # o plano até o mês m, R$ 1 direto na dívida j e a retomada dali
+    a = simulate_arrays(saldo, rate_m, parcela, aportes[:m], m)
+    s = a["saldo_final"].copy()
+    s[j] -= 1.0
+    payoff = np.where(a["payoff_mes"] > 0, a["payoff_mes"], 0)
+    snowball = a["snowball_para_prox"][-1]
+    if s[j] <= 0.0:  # o R$ 1 quitou a dívida: a parcela dela entra na bola de neve
+        s[j] = 0.0
+        payoff[j] = m
+        snowball += parcela[j]
+    b = simulate_arrays(s, rate_m, parcela, aportes[m:], MESES - m, snowball0=snowball, payoff0=payoff)
+    return a["juros_do_mes"].sum() + b["juros_do_mes"].sum()
+
+
+@pytest.mark.parametrize("nome", ["dividas.csv", "sint-2"])
+def test_marginal_matches_single_runs(nome):
+    debts, ap = carteira(nome)
+    saldo, rate_m, parcela = debts_to_arrays(debts)
+    res = marginal_value(debts, ap, MESES)
+    juros_base = simulate_arrays(saldo, rate_m, parcela, ap, MESES)["juros_do_mes"].sum()
+    assert res["juros_base"] == pytest.approx(juros_base, abs=1e-9)
+
+    rng = np.random.default_rng(0)
+    for k in rng.choice(res["mes"].size, 20, replace=False):
+        m, j = int(res["mes"][k]), int(res["divida"][k])
+        direto = juros_base - juros_direcionado(saldo, rate_m, parcela, ap, m, j)
+        assert res["economia_direcionada"][k] == pytest.approx(direto, abs=1e-6)
+
+        ap_mais = ap.copy()
+        ap_mais[m - 1] += 1.0
+        cascata = juros_base - simulate_arrays(saldo, rate_m, parcela, ap_mais, MESES)["juros_do_mes"].sum()
+        assert res["economia_cascata"][k] == pytest.approx(cascata, abs=1e-6)
@@ -0,0 +1,58 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dividas import ledger
+from dividas.core import BASE_START, load_csv_if_exists, prepare_debts
+from dividas.engine import aportes_to_array
+from dividas.replay import replay
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MESES = 120
+ATE = "2026-09"  # 13ª competência desde BASE_START
+
+
+@pytest.fixture
+def livro(tmp_path):
+    # o histórico que acompanha o repositório (só 2025-08, antes do plano)
+    db = str(tmp_path / "pagamentos.sqlite")
+    ledger.connect(db, legacy_csv=os.path.join(ROOT, "pagamentos.csv")).close()
+    return db
+
+
+@pytest.fixture
+def plano():
+    debts = prepare_debts(load_csv_if_exists(os.path.join(ROOT, "dividas.csv")), 4.7)
+    return debts, aportes_to_array(load_csv_if_exists(os.path.join(ROOT, "aportes.csv")), MESES)
+
+
+def checklist(debts, pago, omitir=()):
+    ids = [d for d in debts["id"] if d not in omitir]
+    return pd.DataFrame({"id": ids, "pago": [pago.get(d, True) for d in ids], "data_pagamento": ""})
+
+
+def test_unrecorded_months_follow_the_plan(livro, plano):
+    debts, ap = plano
+    ledger.save_competencia(checklist(debts, {}), ATE, path=livro)
+    res = replay(debts, ap, MESES, BASE_START, ate=ATE, path=livro)
+    assert res["meses_realizados"] == 13
+    assert res["registradas"] == 1
+    assert res["parcelas_perdidas"].sum() == 0
+    np.testing.assert_allclose(res["saldo_real"], res["saldo_plano"], atol=1e-6)
+    np.testing.assert_array_equal(res["payoff_reprojetado"], res["payoff_plano"])
+    assert res["juros_reprojetado"] == pytest.approx(res["juros_plano"], abs=1e-6)
+
+
+@pytest.mark.parametrize("aportes_feitos", [True, False])
+def test_recorded_month_counts_unpaid_and_missing(livro, plano, aportes_feitos):
+    debts, ap = plano
+    # só dívidas que o plano ainda não quitou até a competência
+    ids = list(debts["id"][-2:])
+    ledger.save_competencia(checklist(debts, {ids[0]: False}, omitir=(ids[1],)), ATE, path=livro)
+    res = replay(debts, ap, MESES, BASE_START, ate=ATE, aportes_feitos=aportes_feitos, path=livro)
+    perdidas = dict(zip(debts["id"], res["parcelas_perdidas"]))
+    assert perdidas[ids[0]] == 1 and perdidas[ids[1]] == 1
+    assert sum(perdidas.values()) == 2
+    assert res["saldo_real"].sum() > res["saldo_plano"].sum()